@@ -0,0 +1,161 @@
+"""
+Whole-graph statistics for a degrees dataset, computed with NumPy and
+SciPy sparse matrices over the person x movie incidence matrix.
+
+Usage: python analytics.py [directory] [samples]
+"""
+
+import sys
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse import csgraph
+
+import degrees
+
+# Most entries of the people x people product held at once by costar_degrees
+BLOCK_ENTRIES = 1 << 22
+
+
+def incidence_matrix(graph):
+    """
+    Returns the people x movies CSR matrix of credits.
+
+    The index arrays are shared with the graph rather than copied.
+    """
+    indptr = np.frombuffer(graph.person_offsets, dtype=np.int64)
+    indices = np.frombuffer(graph.person_movies, dtype=np.int32)
+    data = np.ones(len(indices), dtype=np.int32)
+    return sparse.csr_matrix(
+        (data, indices, indptr), shape=(graph.num_people(), graph.num_movies())
+    )
+
+
+def connected_components(graph):
+    """
+    Returns (count, labels) for the components of people linked by
+    shared movies. A person without movies is a component of their own.
+    """
+    incidence = incidence_matrix(graph)
+    people = incidence.shape[0]
+    bipartite = sparse.bmat([[None, incidence], [incidence.T, None]], format="csr")
+    _, labels = csgraph.connected_components(bipartite, directed=False)
+
+    # Renumber the people's labels densely, dropping movie-only labels
+    _, person_labels = np.unique(labels[:people], return_inverse=True)
+    return int(person_labels.max(initial=-1)) + 1, person_labels
+
+
+def component_sizes(graph):
+    """
+    Returns the number of people in each component, largest first.
+    """
+    _, labels = connected_components(graph)
+    return np.sort(np.bincount(labels))[::-1]
+
+
+def costar_degrees(graph, block_entries=BLOCK_ENTRIES):
+    """
+    Returns the number of distinct co-stars of every person.
+
+    The people x people product is computed a block of people at a
+    time, each with at most about `block_entries` entries, so only one
+    block of it is held in memory.
+    """
+    incidence = incidence_matrix(graph)
+    incidence_t = incidence.T.tocsr()
+    people = incidence.shape[0]
+
+    # A person's row has at most as many entries as their movies have stars
+    bounds = np.cumsum(incidence @ np.diff(incidence_t.indptr))
+
+    counts = np.empty(people, dtype=np.int64)
+    start = 0
+    while start < people:
+        done = bounds[start - 1] if start else 0
+        stop = int(np.searchsorted(bounds, done + block_entries, side="right"))
+        stop = max(stop, start + 1)
+        block = incidence[start:stop] @ incidence_t
+        counts[start:stop] = np.diff(block.indptr)
+        start = stop
+
+    # Everyone with a movie is counted as their own co-star
+    counts -= np.diff(incidence.indptr) > 0
+    return counts
+
+
+def degree_distribution(graph):
+    """
+    Returns an array whose i-th entry counts people with i co-stars.
+    """
+    return np.bincount(costar_degrees(graph))
+
+
+def eccentricity(graph, person, incidence=None):
+    """
+    Returns (distance, farthest person index) for the person index
+    farthest from `person` in its component.
+
+    Each breadth-first layer is two sparse matrix-vector products,
+    people to movies and movies back to people.
+    """
+    if incidence is None:
+        incidence = incidence_matrix(graph)
+    incidence_t = incidence.T.tocsr()
+    visited = np.zeros(incidence.shape[0], dtype=bool)
+    visited[person] = True
+    frontier = visited.copy()
+    distance = 0
+    farthest = person
+    while True:
+        movies = incidence_t @ frontier.astype(np.int8)
+        reached = (incidence @ (movies > 0).astype(np.int8)) > 0
+        frontier = reached & ~visited
+        if not frontier.any():
+            return distance, farthest
+        visited |= frontier
+        distance += 1
+        farthest = int(np.flatnonzero(frontier)[0])
+
+
+def sampled_diameter(graph, samples=10, seed=0):
+    """
+    Returns a lower bound on the diameter of the largest component.
+
+    Starts a double sweep at `samples` random people of that component:
+    a search from each person, then another from the farthest person found.
+    """
+    _, labels = connected_components(graph)
+    largest = np.flatnonzero(labels == np.argmax(np.bincount(labels)))
+    rng = np.random.default_rng(seed)
+    starts = rng.choice(largest, size=min(samples, len(largest)), replace=False)
+
+    incidence = incidence_matrix(graph)
+    diameter = 0
+    for start in starts:
+        _, farthest = eccentricity(graph, int(start), incidence)
+        distance, _ = eccentricity(graph, farthest, incidence)
+        diameter = max(diameter, distance)
+    return diameter
+
+
+def main():
+    if len(sys.argv) > 3:
+        sys.exit("Usage: python analytics.py [directory] [samples]")
+    directory = sys.argv[1] if len(sys.argv) >= 2 else "large"
+    samples = int(sys.argv[2]) if len(sys.argv) == 3 else 10
+
+    degrees.load_data(directory)
+    graph = degrees.graph
+    sizes = component_sizes(graph)
+    distribution = degree_distribution(graph)
+    print(f"People: {graph.num_people()}, movies: {graph.num_movies()}")
+    print(f"Components: {len(sizes)}, largest: {sizes[0] if len(sizes) else 0}")
+    print("Co-star degree distribution (degree: people):")
+    for degree in np.flatnonzero(distribution):
+        print(f"  {degree}: {distribution[degree]}")
+    print(f"Sampled diameter: {sampled_diameter(graph, samples)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Answer many degrees-of-separation queries without prompting.
+
+Reads one "source_id,target_id" pair per line (a tab works too) from a
+file or stdin and writes one JSON object per line with the path. Lines
+that are not a pair get a {"line", "error"} object instead.
+
+The data is a directory of CSV files, or a SQLite database file written
+by sqlitestore.py, as for degrees.py.
+
+Usage: python batch.py [-d directory|database] [-w workers] [pairs]
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+
+import degrees
+
+
+def parse_pairs(lines):
+    """
+    Yields (source, target) person id pairs, skipping blank lines.
+
+    Lines without two ids are yielded as (line, None).
+    """
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        fields = [field.strip() for field in line.replace("\t", ",").split(",")]
+        if len(fields) < 2 or not fields[0] or not fields[1]:
+            yield line, None
+            continue
+        yield fields[0], fields[1]
+
+
+def answer(pair):
+    """
+    Returns the JSON line for one (source, target) pair.
+    """
+    source, target = pair
+    if target is None:
+        return json.dumps({"line": source, "error": "Expected source_id,target_id."})
+    record = {"source": source, "target": target}
+    if source not in degrees.people or target not in degrees.people:
+        record["error"] = "Person not found."
+    else:
+        path = degrees.shortest_path(source, target)
+        record["degrees"] = None if path is None else len(path)
+        record["path"] = path
+    return json.dumps(record)
+
+
+def load(directory):
+    """
+    Loads a directory of CSV files, or opens a SQLite database file.
+    """
+    if os.path.isfile(directory):
+        degrees.load_database(directory)
+    else:
+        degrees.load_data(directory)
+
+
+def init_worker(directory):
+    """
+    Loads the data in a worker that was spawned rather than forked.
+
+    A database connection is never shared with the parent, so every
+    worker opens its own.
+    """
+    if degrees.graph is None or os.path.isfile(directory):
+        load(directory)
+
+
+def run(directory, lines, out, workers=1, chunksize=256):
+    """
+    Answers every pair in `lines` and writes the JSON lines to `out`
+    in input order.
+    """
+    load(directory)
+    pairs = parse_pairs(lines)
+
+    if workers == 1:
+        for pair in pairs:
+            out.write(answer(pair) + "\n")
+        return
+
+    # Forked workers share the loaded graph copy-on-write;
+    # spawned workers map the snapshot written by load_data
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+    with context.Pool(workers, init_worker, (directory,)) as pool:
+        for line in pool.imap(answer, pairs, chunksize):
+            out.write(line + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("pairs", nargs="?", help="file of id pairs, default stdin")
+    parser.add_argument("-d", "--directory", default="large")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--chunksize", type=int, default=256)
+    args = parser.parse_args()
+
+    if args.pairs is None:
+        run(args.directory, sys.stdin, sys.stdout, args.workers, args.chunksize)
+    else:
+        with open(args.pairs, encoding="utf-8") as f:
+            run(args.directory, f, sys.stdout, args.workers, args.chunksize)
+
+
+if __name__ == "__main__":
+    main()
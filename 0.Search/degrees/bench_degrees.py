@@ -0,0 +1,99 @@
+"""
+pytest-benchmark suite for loading and searching a generated dataset.
+
+Usage: python -m pytest bench_degrees.py [--benchmark-json=results.json]
+
+The dataset has DEGREES_BENCH_CREDITS credits (100000 by default).
+Load peaks are recorded as `peak_bytes` and query latency percentiles
+as `p50_ms`, `p90_ms` and `p99_ms` in each benchmark's extra_info.
+"""
+
+import os
+import random
+import tracemalloc
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+import degrees
+import generate
+import snapshot
+
+CREDITS = int(float(os.environ.get("DEGREES_BENCH_CREDITS", 100_000)))
+QUERIES = 200
+
+
+@pytest.fixture(scope="module")
+def dataset(tmp_path_factory):
+    directory = str(tmp_path_factory.mktemp("generated"))
+    generate.generate(directory, CREDITS)
+    return directory
+
+
+def remove_snapshot(directory):
+    path = os.path.join(directory, snapshot.FILENAME)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def peak_memory(function, *args):
+    """
+    Returns the peak bytes allocated by Python while calling the function.
+    """
+    tracemalloc.start()
+    try:
+        function(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def record_percentiles(benchmark):
+    timings = benchmark.stats.stats.data
+    for fraction in (0.5, 0.9, 0.99):
+        key = f"p{round(fraction * 100)}_ms"
+        benchmark.extra_info[key] = percentile(timings, fraction) * 1000
+
+
+def test_load_csv(benchmark, dataset):
+    benchmark.extra_info["credits"] = CREDITS
+    benchmark.pedantic(
+        degrees.load_data,
+        args=(dataset,),
+        setup=lambda: remove_snapshot(dataset),
+        rounds=3,
+    )
+    remove_snapshot(dataset)
+    benchmark.extra_info["peak_bytes"] = peak_memory(degrees.load_data, dataset)
+    assert degrees.graph.num_people() > 0
+
+
+def test_load_snapshot(benchmark, dataset):
+    benchmark.extra_info["credits"] = CREDITS
+    degrees.load_data(dataset)
+    benchmark.pedantic(degrees.load_data, args=(dataset,), rounds=5)
+    benchmark.extra_info["peak_bytes"] = peak_memory(degrees.load_data, dataset)
+
+
+def test_shortest_path(benchmark, dataset):
+    degrees.load_data(dataset)
+    rng = random.Random(0)
+    person_ids = list(degrees.people)
+    pairs = iter(
+        [(rng.choice(person_ids), rng.choice(person_ids)) for _ in range(QUERIES)]
+    )
+
+    # One uncached query per round, so every round is timed separately
+    benchmark.pedantic(
+        lambda: degrees.shortest_path(*next(pairs)),
+        setup=degrees.path_cache.clear,
+        rounds=QUERIES,
+    )
+    benchmark.extra_info["credits"] = CREDITS
+    record_percentiles(benchmark)
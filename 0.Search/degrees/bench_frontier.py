@@ -0,0 +1,50 @@
+"""
+Microbenchmark for the frontier classes in util.py.
+
+Fills each frontier with n nodes, checks membership for every state
+and then drains it. With constant-time operations the time per node
+stays flat as n grows.
+
+Usage: python bench_frontier.py [max_exponent]
+"""
+
+import sys
+import time
+
+from util import Node, PriorityFrontier, QueueFrontier, StackFrontier
+
+
+def run(frontier_class, n):
+    """
+    Returns the seconds taken to add, look up and remove n nodes.
+    """
+    nodes = [Node(state=i, parent=None, action=None) for i in range(n)]
+    frontier = frontier_class()
+    start = time.perf_counter()
+    for node in nodes:
+        frontier.add(node)
+    for i in range(n):
+        frontier.contains_state(i)
+    while not frontier.empty():
+        frontier.remove()
+    return time.perf_counter() - start
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python bench_frontier.py [max_exponent]")
+    max_exponent = int(sys.argv[1]) if len(sys.argv) == 2 else 6
+
+    print(f"{'frontier':<16}{'n':>10}{'total s':>10}{'ns/node':>10}")
+    for frontier_class in (StackFrontier, QueueFrontier, PriorityFrontier):
+        for exponent in range(4, max_exponent + 1):
+            n = 10**exponent
+            seconds = run(frontier_class, n)
+            print(
+                f"{frontier_class.__name__:<16}{n:>10}"
+                f"{seconds:>10.3f}{seconds / n * 1e9:>10.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
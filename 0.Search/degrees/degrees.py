@@ -1,55 +1,248 @@
 import csv
+import heapq
+import os
 import sys
-
-from util import Node, StackFrontier, QueueFrontier
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import deque
+from itertools import count, islice
+from operator import itemgetter
+
+import snapshot
+import sqlitestore
+from graph import CoStarGraph, movie_year, movie_years
+from instrument import NullSink
+from nameindex import NameIndex
+from pathcache import MISSING, PathCache
+from util import UNREACHED, Node, QueueFrontier, SearchTree
 
 # Maps names to a set of corresponding person_ids
 names = {}
 
-# Maps person_ids to a dictionary of: name, birth, movies (a set of movie_ids)
+# Maps person_ids to a dictionary of: name, birth
 people = {}
 
-# Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
+# Maps movie_ids to a dictionary of: title, year
 movies = {}
 
+# Co-star graph over people and movies, built by load_data
+graph = None
+
+# Key of the CSV files the loaded data was read from, see snapshot.source_key
+source = None
+
+# Prefix and fuzzy index over names, built by build_name_index
+name_index = None
+
+# Forward and backward search trees of the last graph searched, see search_trees
+trees = None
+
+# Recently computed shortest paths, valid for the current graph only
+path_cache = PathCache()
+
+# Receives search events, see instrument.py for counting and tracing sinks
+sink = NullSink()
 
-def load_data(directory):
+# Number of CSV rows read between progress reports
+CHUNK_SIZE = 100_000
+
+
+def load_data(
+    directory, chunk_size=CHUNK_SIZE, progress=None, partial=False, index_names=False
+):
     """
     Load data from CSV files into memory.
+
+    The files are read in chunks of `chunk_size` rows, and
+    `progress(filename, rows, rows_per_second)` is called after each one.
+    With `partial`, a graph of the credits read so far is published
+    whenever their number doubles, so queries can run during loading.
+    With `index_names`, the name index is built before returning.
+
+    The parsed data is also written to a binary snapshot next to the
+    CSV files, which later calls load instead while the files are unchanged.
+    """
+    global names, people, movies, graph, name_index, source
+
+    name_index = None
+
+    # The key is read before parsing, so that files changed meanwhile
+    # make the snapshot stale rather than stored under their new key
+    source = snapshot.source_key(directory)
+
+    # Reuse the snapshot if the CSV files have not changed
+    loaded = snapshot.load(directory, source)
+    if loaded is not None:
+        names, people, movies, graph = loaded
+        if index_names:
+            build_name_index()
+        return
+
+    names = {}
+    people = {}
+    movies = {}
+
+    edge_people = array("i")
+    edge_movies = array("i")
+    # No graph is published before the first credits are read
+    published = 1
+    for _ in stream_data(directory, edge_people, edge_movies, chunk_size, progress):
+        if partial and len(edge_people) >= 2 * published:
+            published = len(edge_people)
+            graph = CoStarGraph.from_edges(
+                list(people),
+                list(movies),
+                edge_people,
+                edge_movies,
+                movie_years(movies.values()),
+            )
+
+    graph = CoStarGraph.from_edges(
+        list(people),
+        list(movies),
+        edge_people,
+        edge_movies,
+        movie_years(movies.values()),
+    )
+    snapshot.save(directory, source, people, movies, graph)
+    if index_names:
+        build_name_index()
+
+
+def load_database(filename, cache_size=1_000_000, index_names=False):
+    """
+    Use a SQLite database written by sqlitestore.py instead of loading
+    the data into memory.
+
+    People, movies and names are looked up in the database as needed,
+    and at most `cache_size` ids of adjacency are cached per side.
+    With `index_names`, the name index is built before returning.
+    """
+    global names, people, movies, graph, name_index, source
+
+    name_index = None
+    source = None
+    names, people, movies, graph = sqlitestore.open_database(filename, cache_size)
+    if index_names:
+        build_name_index()
+
+
+def load_data_in_background(directory, chunk_size=CHUNK_SIZE, progress=None):
+    """
+    Starts loading data on a thread and returns the thread.
+
+    Partial graphs are published while it runs; join the thread
+    to wait for the complete one, whose name index is also built.
+    """
+    thread = threading.Thread(
+        target=load_data,
+        args=(directory, chunk_size, progress, True, True),
+        daemon=True,
+    )
+    thread.start()
+    return thread
+
+
+def stream_data(directory, edge_people, edge_movies, chunk_size, progress):
+    """
+    Reads the CSV files chunk by chunk, yielding after every chunk.
+
+    People and movies are added to the global dictionaries as they are
+    read, and each credit is appended as a (person, movie) index pair
+    to `edge_people` and `edge_movies`. Movies are reordered by year
+    before the credits are read, so that movie indexes follow years.
     """
     # Load people
-    with open(f"{directory}/people.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            people[row["id"]] = {
-                "name": row["name"],
-                "birth": row["birth"],
-                "movies": set(),
+    filename = f"{directory}/people.csv"
+    chunks = read_chunks(filename, ("id", "name", "birth"), chunk_size)
+    for chunk in report_progress(chunks, filename, progress):
+        for person_id, name, birth in chunk:
+            people[person_id] = {
+                "name": name,
+                "birth": birth,
             }
-            if row["name"].lower() not in names:
-                names[row["name"].lower()] = {row["id"]}
+            if name.lower() not in names:
+                names[name.lower()] = {person_id}
             else:
-                names[row["name"].lower()].add(row["id"])
+                names[name.lower()].add(person_id)
+        yield
 
     # Load movies
-    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            movies[row["id"]] = {
-                "title": row["title"],
-                "year": row["year"],
-                "stars": set(),
+    filename = f"{directory}/movies.csv"
+    chunks = read_chunks(filename, ("id", "title", "year"), chunk_size)
+    for chunk in report_progress(chunks, filename, progress):
+        for movie_id, title, year in chunk:
+            movies[movie_id] = {
+                "title": title,
+                "year": year,
             }
+        yield
+
+    # Sort movies by year, keeping file order within a year
+    by_year = sorted(movies.items(), key=lambda item: movie_year(item[1]))
+    movies.clear()
+    movies.update(by_year)
+
+    # Intern ids to dense integers for the graph
+    person_index = {person_id: i for i, person_id in enumerate(people)}
+    movie_index = {movie_id: i for i, movie_id in enumerate(movies)}
 
     # Load stars
-    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
+    filename = f"{directory}/stars.csv"
+    chunks = read_chunks(filename, ("person_id", "movie_id"), chunk_size)
+    for chunk in report_progress(chunks, filename, progress):
+        for person_id, movie_id in chunk:
             try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
+                person = person_index[person_id]
+                movie = movie_index[movie_id]
             except KeyError:
-                pass
+                continue
+            edge_people.append(person)
+            edge_movies.append(movie)
+        yield
+
+
+def read_chunks(filename, columns, chunk_size):
+    """
+    Yields lists of up to `chunk_size` tuples holding
+    the named columns of each row in a CSV file.
+    """
+    with open(filename, encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        row_values = itemgetter(*(header.index(column) for column in columns))
+        rows = filter(None, reader)
+        while True:
+            chunk = list(map(row_values, islice(rows, chunk_size)))
+            if not chunk:
+                return
+            yield chunk
+
+
+def report_progress(chunks, filename, progress):
+    """
+    Passes chunks through, calling `progress` with the running row count.
+    """
+    start = time.perf_counter()
+    rows = 0
+    for chunk in chunks:
+        yield chunk
+        rows += len(chunk)
+        if progress is not None:
+            elapsed = time.perf_counter() - start
+            progress(filename, rows, rows / elapsed if elapsed else 0.0)
+
+
+def print_progress(filename, rows, rows_per_second):
+    """
+    Progress callback that reports to stderr.
+    """
+    print(
+        f"{filename}: {rows} rows ({rows_per_second:.0f} rows/s)",
+        file=sys.stderr,
+    )
 
 
 def main():
@@ -57,9 +250,12 @@ def main():
         sys.exit("Usage: python degrees.py [directory]")
     directory = sys.argv[1] if len(sys.argv) == 2 else "large"
 
-    # Load data from files into memory
+    # Load data from files into memory, or open a database file
     print("Loading data...")
-    load_data(directory)
+    if os.path.isfile(directory):
+        load_database(directory)
+    else:
+        load_data(directory)
     print("Data loaded.")
 
     source = person_id_for_name(input("Name: "))
@@ -118,57 +314,427 @@ def main():
 #             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def shortest_path(source, target, min_year=None, max_year=None, excluded=()):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
     If no possible path, returns None.
-    """
 
-    # Keep track of number of states explored
-    num_explored = 0
+    With `min_year` or `max_year`, only movies released in those years
+    (inclusive) are used, and people in `excluded` are never passed through.
+    These constraints are applied while expanding the search, so movies
+    and people they rule out are never visited.
 
-    # Initialize frontier to just the starting position
-    start_node = Node(state=source, parent=None, action=None)
-    frontier = StackFrontier()
-    frontier.add(start_node)
+    Searches breadth-first from the source and the target at the same
+    time, always growing the smaller frontier by one whole layer, and
+    stops at the first layer in which the two searches meet.
 
-    # Initialize an empty explored set
-    explored = set()
+    Answers are cached, see path_cache.cache_info() for hit counts.
+    Searches report to `sink`.
+    """
+    source = str(source)
+    target = str(target)
+    excluded = {str(person_id) for person_id in excluded}
+    if source in excluded or target in excluded:
+        return None
+    if source == target:
+        return []
+
+    # Constrained searches are not cached
+    if min_year is not None or max_year is not None or excluded:
+        if min_year is None and max_year is None:
+            movie_range = None
+        elif isinstance(graph, CoStarGraph):
+            movie_range = graph.movie_range(min_year, max_year)
+        else:
+            raise ValueError("Year constraints need data loaded into memory.")
+        return bidirectional_search(
+            graph.person_index[source],
+            graph.person_index[target],
+            movie_range,
+            # People missing from the graph cannot be on a path anyway
+            [
+                graph.person_index[person_id]
+                for person_id in excluded
+                if person_id in graph.person_index
+            ],
+        )
+
+    if path_cache.graph is not graph:
+        path_cache.clear(graph)
+    path = path_cache.get(source, target)
+    if path is MISSING:
+        path = bidirectional_search(
+            graph.person_index[source], graph.person_index[target]
+        )
+        path_cache.put(source, target, path)
+    return path
+
+
+def bidirectional_search(source, target, movie_range=None, excluded=()):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect two different person indexes, or None.
 
-    while True:
-        # If nothing left in frontier, then no path
-        if frontier.empty():
-            return None
+    Only movie indexes within `movie_range`, a (low, high) pair from
+    CoStarGraph.movie_range, are used if it is given, and person
+    indexes in `excluded` are never reached.
+    """
+    sink.begin(graph.person_ids[source], graph.person_ids[target])
+    forward, backward = search_trees()
+    try:
+        path = search_both_ways(
+            source, target, forward, backward, movie_range, excluded
+        )
+    finally:
+        forward.reset()
+        backward.reset()
+    sink.end(path)
+    return path
+
+
+def search_trees():
+    """
+    Returns the forward and backward search trees for the current graph,
+    allocated once per graph and reused by every search.
+    """
+    global trees
+    if trees is None or trees[0] is not graph:
+        # Row ids of a database graph start at 1
+        size = graph.num_people() + 1
+        trees = (graph, SearchTree(size), SearchTree(size))
+    return trees[1], trees[2]
 
-        # Choose a node from the frontier
-        node = frontier.remove()
-        num_explored += 1
 
-        print(f"Exploring node: {node.state}, explored: {num_explored}")
+def search_both_ways(source, target, forward, backward, movie_range, excluded):
+    """
+    Runs the bidirectional search on two empty search trees,
+    returning the path as bidirectional_search does.
+    """
+    # Each side maps every person it reached to its parent and movie
+    forward.add(source)
+    backward.add(target)
+
+    # Excluded people count as already reached, so neither side adds them
+    for person in excluded:
+        forward.block(person)
+        backward.block(person)
+
+    # Movies whose whole cast has already been reached, per direction
+    forward_movies = set()
+    backward_movies = set()
+
+    # Initialize both frontiers of person indexes to their starting positions
+    forward_frontier = deque([source])
+    backward_frontier = deque([target])
+
+    # The in-memory graph is walked directly, others a layer at a time
+    if isinstance(graph, CoStarGraph):
+        expand = expand_layer
+    else:
+        expand = expand_layer_batched
+
+    while forward_frontier and backward_frontier:
+        # Expand the side with fewer people waiting in its frontier
+        if len(forward_frontier) <= len(backward_frontier):
+            direction = "forward"
+            reached = len(forward)
+            meeting, explored = expand(
+                forward_frontier,
+                forward,
+                forward_movies,
+                backward,
+                direction,
+                movie_range,
+            )
+            added = len(forward) - reached
+        else:
+            direction = "backward"
+            reached = len(backward)
+            meeting, explored = expand(
+                backward_frontier,
+                backward,
+                backward_movies,
+                forward,
+                direction,
+                movie_range,
+            )
+            added = len(backward) - reached
+        sink.layer(
+            direction, explored, added, len(forward_frontier) + len(backward_frontier)
+        )
+
+        # If the searches met, join the two halves into one path
+        if meeting is not None:
+            path = forward.path(meeting)
+            person = meeting
+            while backward.parents[person] != person:
+                parent = backward.parents[person]
+                path.append((backward.actions[person], parent))
+                person = parent
+            return [
+                (graph.movie_ids[movie], graph.person_ids[person])
+                for movie, person in path
+            ]
+
+    # Otherwise one side ran out of people without meeting the other
+    return None
+
+
+def expand_layer(
+    frontier, reached, expanded_movies, other_reached, direction, movie_range=None
+):
+    """
+    Expands every person currently in the frontier by one step.
 
-        # If node's state is the goal, then we have a solution
-        if node.state == str(target):
-            path = []
-            while node.parent is not None:
-                path.append((node.action, node.state))
-                node = node.parent
-            path.reverse()
-            return path
+    Newly reached people are added to the frontier and to the `reached`
+    search tree. Returns the first person that is also in `other_reached`,
+    or None if the two searches have not met yet, and the number of
+    people expanded.
 
-        # Mark the node as explored
-        explored.add(str(node.state))
+    Each person's movies are sorted by index, and so by year, so with a
+    `movie_range` only the part of them inside the range is scanned.
+    """
+    person_offsets = graph.person_offsets
+    person_movies = graph.person_movies
+    movie_offsets = graph.movie_offsets
+    movie_people = graph.movie_people
+    parents = reached.parents
+    actions = reached.actions
+    reached_people = reached.reached
+    other_parents = other_reached.parents
+    trace = sink.node
+
+    layer_size = len(frontier)
+    for explored in range(1, layer_size + 1):
+        person = frontier.popleft()
+        start = person_offsets[person]
+        end = person_offsets[person + 1]
+        if movie_range is not None:
+            start = bisect_left(person_movies, movie_range[0], start, end)
+            end = bisect_left(person_movies, movie_range[1], start, end)
+        for i in range(start, end):
+            movie = person_movies[i]
+            if movie in expanded_movies:
+                continue
+            expanded_movies.add(movie)
+            for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                costar = movie_people[j]
+                if parents[costar] != UNREACHED:
+                    continue
+                parents[costar] = person
+                actions[costar] = movie
+                reached_people.append(costar)
+                if trace is not None:
+                    trace(
+                        direction,
+                        graph.person_ids[costar],
+                        graph.movie_ids[movie],
+                        graph.person_ids[person],
+                    )
+                if other_parents[costar] != UNREACHED:
+                    return costar, explored
+                frontier.append(costar)
+    return None, layer_size
+
+
+def expand_layer_batched(
+    frontier, reached, expanded_movies, other_reached, direction, movie_range=None
+):
+    """
+    Same as expand_layer, but fetches the movies of the whole layer and
+    then the stars of all its new movies in one batch each, for graphs
+    kept outside memory. These have no movie years, so `movie_range`
+    must be None.
+    """
+    trace = sink.node
+    layer = [frontier.popleft() for _ in range(len(frontier))]
+    movies_by_person = graph.movies_of_many(layer)
+    stars_by_movie = graph.stars_of_many(
+        {
+            movie
+            for movies_of_person in movies_by_person.values()
+            for movie in movies_of_person
+            if movie not in expanded_movies
+        }
+    )
+
+    for explored, person in enumerate(layer, 1):
+        for movie in movies_by_person[person]:
+            if movie in expanded_movies:
+                continue
+            expanded_movies.add(movie)
+            for costar in stars_by_movie[movie]:
+                if costar in reached:
+                    continue
+                reached.add(costar, person, movie)
+                if trace is not None:
+                    trace(
+                        direction,
+                        graph.person_ids[costar],
+                        graph.movie_ids[movie],
+                        graph.person_ids[person],
+                    )
+                if costar in other_reached:
+                    return costar, explored
+                frontier.append(costar)
+    return None, len(layer)
+
+
+def all_shortest_paths(source, target):
+    """
+    Yields every shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, one at a time.
+
+    Runs one layered breadth-first search to build the graph of
+    shortest-path parents, then walks it back from the target, so only
+    the path being yielded is held in memory.
+    """
+    source = graph.person_index[str(source)]
+    target = graph.person_index[str(target)]
+    if source == target:
+        yield []
+        return
+
+    parents = shortest_path_parents(source, target)
+    if target not in parents:
+        return
+
+    stack = [(target, [])]
+    while stack:
+        person, suffix = stack.pop()
+        if person == source:
+            yield [
+                (graph.movie_ids[movie], graph.person_ids[person])
+                for movie, person in reversed(suffix)
+            ]
+            continue
+        for movie, parent in reversed(parents[person]):
+            stack.append((parent, suffix + [(movie, person)]))
+
+
+def shortest_path_parents(source, target):
+    """
+    Searches breadth-first from the source until the target's layer is
+    complete.
+
+    Returns a dictionary mapping each reached person index to every
+    (movie, parent) pair that reaches it from the previous layer.
+    """
+    depth = {source: 0}
+    parents = {}
+    expanded_movies = set()
+    layer = [source]
+    while layer and target not in parents:
+        # Group the layer's new movies with the people who starred in them
+        movie_parents = {}
+        for person in layer:
+            for movie in graph.movies_of(person):
+                if movie not in expanded_movies:
+                    movie_parents.setdefault(movie, []).append(person)
+        expanded_movies.update(movie_parents)
+
+        next_depth = depth[layer[0]] + 1
+        next_layer = []
+        for movie, stars in movie_parents.items():
+            for costar in graph.stars_of(movie):
+                if costar not in depth:
+                    depth[costar] = next_depth
+                    parents[costar] = []
+                    next_layer.append(costar)
+                if depth[costar] == next_depth:
+                    parents[costar].extend((movie, person) for person in stars)
+        layer = next_layer
+    return parents
+
+
+def k_shortest_paths(source, target, k=None):
+    """
+    Yields up to `k` different lists of (movie_id, person_id) pairs
+    connecting the source to the target without repeating a person,
+    shortest first, using Yen's algorithm.
 
-        # Add neighbors to the frontier
-        for movie_id, person_id in neighbors_for_person(str(node.state)):
-            if not frontier.contains_state(person_id) and person_id not in explored:
-                child = Node(state=person_id, parent=node, action=movie_id)
-                frontier.add(child)
-                print(
-                    f"Adding nodes: parent id: {node.state}, added id: {child.state}"
-                    f" stared in movie {child.action}"
-                )
+    With k=None, keeps yielding until every such path has been produced,
+    and with k <= 0 yields nothing.
+    """
+    if k is not None and k <= 0:
+        return
+    source = graph.person_index[str(source)]
+    target = graph.person_index[str(target)]
+    if source == target:
+        yield []
+        return
+
+    path = constrained_path(source, target, set(), set())
+    if path is None:
+        return
+    found = [path]
+    seen = {tuple(path)}
+    candidates = []
+    counter = count()
+    while True:
+        yield [
+            (graph.movie_ids[movie], graph.person_ids[person]) for movie, person in path
+        ]
+        if k is not None and len(found) >= k:
+            return
+
+        # Branch off the last path at each of its people in turn
+        people_on_path = [source] + [person for _, person in path]
+        for i in range(len(path)):
+            spur = people_on_path[i]
+            root = path[:i]
+            removed_edges = {
+                (spur, *other[i])
+                for other in found
+                if len(other) > i and other[:i] == root
+            }
+            removed_people = set(people_on_path[:i])
+            spur_path = constrained_path(spur, target, removed_people, removed_edges)
+            if spur_path is not None:
+                candidate = tuple(root + spur_path)
+                if candidate not in seen:
+                    seen.add(candidate)
+                    heapq.heappush(
+                        candidates, (len(candidate), next(counter), candidate)
+                    )
+
+        if not candidates:
+            return
+        path = list(heapq.heappop(candidates)[2])
+        found.append(path)
+
+
+def constrained_path(source, target, removed_people, removed_edges):
+    """
+    Returns the shortest list of (movie, person) index pairs from source
+    to target that avoids `removed_people` and every
+    (person, movie, person) edge in `removed_edges`, or None.
+    """
+    frontier = QueueFrontier()
+    frontier.add(Node(state=source, parent=None, action=None))
+    reached = {source}
+    while not frontier.empty():
+        node = frontier.remove()
+        for movie, person in graph.neighbors(node.state):
+            if (
+                person in reached
+                or person in removed_people
+                or (node.state, movie, person) in removed_edges
+            ):
+                continue
+            child = Node(state=person, parent=node, action=movie)
+            if person == target:
+                path = []
+                while child.parent is not None:
+                    path.append((child.action, child.state))
+                    child = child.parent
+                path.reverse()
+                return path
+            reached.add(person)
+            frontier.add(child)
+    return None
 
 
 def person_id_for_name(name):
@@ -197,16 +763,51 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def complete_names(prefix, limit=10):
+    """
+    Returns up to `limit` known names starting with `prefix`,
+    in lowercase as used by `names`.
+    """
+    return get_name_index().complete(prefix, limit)
+
+
+def similar_names(name, limit=5, max_distance=1):
+    """
+    Returns up to `limit` (name, edit distance) pairs for the known
+    names closest to a possibly misspelled `name`.
+    """
+    return get_name_index().search(name, limit, max_distance)
+
+
+def build_name_index():
+    """
+    Builds the name index for the loaded data.
+
+    Pass `index_names` to load_data or load_database to build it while
+    loading, rather than on the first lookup.
+    """
+    global name_index
+    name_index = NameIndex(names)
+    return name_index
+
+
+def get_name_index():
+    """
+    Returns the name index for the loaded data, building it if needed.
+    """
+    if name_index is None:
+        return build_name_index()
+    return name_index
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
-    movie_ids = people[person_id]["movies"]
     neighbors = set()
-    for movie_id in movie_ids:
-        for person_id in movies[movie_id]["stars"]:
-            neighbors.add((movie_id, person_id))
+    for movie, person in graph.neighbors(graph.person_index[person_id]):
+        neighbors.add((graph.movie_ids[movie], graph.person_ids[person]))
     return neighbors
 
 
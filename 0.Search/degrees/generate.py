@@ -0,0 +1,106 @@
+"""
+Deterministic generator of IMDb-shaped datasets for degrees.
+
+Writes people.csv, movies.csv and stars.csv with the columns of the real
+data. Cast sizes follow a power law, and a few people appear in many
+movies while most appear in one or two, as in the IMDb credits.
+
+Usage: python generate.py directory credits [seed]
+"""
+
+import csv
+import os
+import random
+import sys
+
+# Cast sizes follow P(size >= s) = (MIN_CAST / s) ** CAST_ALPHA
+CAST_ALPHA = 1.5
+MIN_CAST = 2
+MAX_CAST = 250
+
+# People per credit, and how strongly credits favour the first people
+PEOPLE_PER_CREDIT = 0.4
+POPULARITY_SKEW = 2.0
+
+FIRST_NAMES = (
+    "Alex", "Anna", "Ben", "Chris", "Dana", "Emma", "Frank", "Grace",
+    "Hugo", "Iris", "Jack", "Kate", "Leo", "Maria", "Nick", "Olga",
+    "Paul", "Rosa", "Sam", "Tom", "Uma", "Victor", "Wendy", "Yuri",
+)
+LAST_NAMES = (
+    "Adams", "Baker", "Clark", "Davis", "Evans", "Fisher", "Garcia",
+    "Hughes", "Ivanov", "Jones", "Kim", "Lopez", "Moore", "Nguyen",
+    "Owens", "Patel", "Quinn", "Rossi", "Smith", "Turner", "Weber",
+)
+WORDS = (
+    "Last", "Night", "City", "Road", "Secret", "Summer", "Dark", "River",
+    "Home", "Lost", "Storm", "Heart", "Game", "King", "Blue", "Fire",
+)
+
+
+def generate(directory, credits, seed=0):
+    """
+    Writes a dataset of exactly `credits` (person, movie) credits into
+    `directory`. The same `credits` and `seed` always give the same files.
+
+    Returns (people, movies), the number of rows written to each file.
+    """
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    num_people = max(1, int(credits * PEOPLE_PER_CREDIT))
+
+    # People, with birth years unknown for a few of them
+    with open(
+        os.path.join(directory, "people.csv"), "w", encoding="utf-8", newline=""
+    ) as f:
+        writer = csv.writer(f)
+        writer.writerow(("id", "name", "birth"))
+        for person in range(num_people):
+            name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+            birth = "" if rng.random() < 0.05 else rng.randint(1900, 2005)
+            writer.writerow((person + 1, name, birth))
+
+    # Movies and their casts, written side by side
+    num_movies = 0
+    with open(
+        os.path.join(directory, "movies.csv"), "w", encoding="utf-8", newline=""
+    ) as movies_file, open(
+        os.path.join(directory, "stars.csv"), "w", encoding="utf-8", newline=""
+    ) as stars_file:
+        movies = csv.writer(movies_file)
+        stars = csv.writer(stars_file)
+        movies.writerow(("id", "title", "year"))
+        stars.writerow(("person_id", "movie_id"))
+        remaining = credits
+        while remaining > 0:
+            size = min(
+                int(MIN_CAST * rng.paretovariate(CAST_ALPHA)),
+                MAX_CAST,
+                num_people,
+                remaining,
+            )
+            num_movies += 1
+            movie_id = 1_000_000 + num_movies
+            title = " ".join(rng.sample(WORDS, rng.randint(1, 3)))
+            movies.writerow((movie_id, title, rng.randint(1920, 2020)))
+
+            # Draw distinct people, favouring low person numbers
+            cast = set()
+            while len(cast) < size:
+                cast.add(int(num_people * rng.random() ** POPULARITY_SKEW) + 1)
+            stars.writerows((person_id, movie_id) for person_id in sorted(cast))
+            remaining -= size
+
+    return num_people, num_movies
+
+
+def main():
+    if len(sys.argv) not in (3, 4):
+        sys.exit("Usage: python generate.py directory credits [seed]")
+    seed = int(sys.argv[3]) if len(sys.argv) == 4 else 0
+    people, movies = generate(sys.argv[1], int(float(sys.argv[2])), seed)
+    print(f"Wrote {people} people and {movies} movies to {sys.argv[1]}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Compact co-star graph stored as integer adjacency arrays.
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+
+
+class CoStarGraph:
+    """
+    Bipartite graph of people and movies in compressed sparse row layout.
+
+    People are interned to dense integers in load order, and movies in
+    order of year when `movie_years` holds their sorted years, so the
+    movies of every person are also sorted by year.
+    The movies of person `p` are
+    `person_movies[person_offsets[p]:person_offsets[p + 1]]`
+    and the stars of movie `m` are
+    `movie_people[movie_offsets[m]:movie_offsets[m + 1]]`.
+
+    The id lookups `person_index` and `movie_index` are built from the
+    ids unless mappings are given, as a snapshot does.
+    """
+
+    def __init__(
+        self,
+        person_ids,
+        movie_ids,
+        person_offsets,
+        person_movies,
+        movie_offsets,
+        movie_people,
+        movie_years=None,
+        person_index=None,
+        movie_index=None,
+    ):
+        self.person_ids = person_ids
+        self.movie_ids = movie_ids
+        if person_index is None:
+            person_index = {person_id: i for i, person_id in enumerate(person_ids)}
+        if movie_index is None:
+            movie_index = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+        self.person_index = person_index
+        self.movie_index = movie_index
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_people = movie_people
+        self.movie_years = movie_years
+
+    @classmethod
+    def from_edges(
+        cls, person_ids, movie_ids, edge_people, edge_movies, movie_years=None
+    ):
+        """
+        Builds the graph from parallel arrays of (person, movie) indexes.
+
+        Duplicate credits are dropped.
+        """
+        person_offsets, person_movies = compress(
+            len(person_ids), edge_people, edge_movies
+        )
+        movie_offsets, movie_people = compress(len(movie_ids), edge_movies, edge_people)
+        return cls(
+            person_ids,
+            movie_ids,
+            person_offsets,
+            person_movies,
+            movie_offsets,
+            movie_people,
+            movie_years,
+        )
+
+    def num_people(self):
+        return len(self.person_ids)
+
+    def num_movies(self):
+        return len(self.movie_ids)
+
+    def movie_range(self, min_year=None, max_year=None):
+        """
+        Returns (low, high) such that the movie indexes from `low` up to
+        but excluding `high` are those released between `min_year` and
+        `max_year`, inclusive. Either bound may be None.
+
+        Movies of unknown year are outside every range.
+        """
+        if self.movie_years is None:
+            raise ValueError("Graph has no movie years.")
+        years = self.movie_years
+        low = bisect_left(years, 1 if min_year is None else min_year)
+        high = len(years) if max_year is None else bisect_right(years, max_year)
+        return low, max(low, high)
+
+    def movies_of(self, person):
+        """
+        Yields the movie indexes of a person index.
+        """
+        person_movies = self.person_movies
+        for i in range(self.person_offsets[person], self.person_offsets[person + 1]):
+            yield person_movies[i]
+
+    def stars_of(self, movie):
+        """
+        Yields the person indexes of a movie index.
+        """
+        movie_people = self.movie_people
+        for i in range(self.movie_offsets[movie], self.movie_offsets[movie + 1]):
+            yield movie_people[i]
+
+    def neighbors(self, person):
+        """
+        Yields (movie, person) index pairs for everyone
+        who starred with a person index, including the person.
+        """
+        person_offsets = self.person_offsets
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_people = self.movie_people
+        for i in range(person_offsets[person], person_offsets[person + 1]):
+            movie = person_movies[i]
+            for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                yield movie, movie_people[j]
+
+
+def movie_year(movie):
+    """
+    Returns the year of a movie record as an int, or 0 if it is unknown.
+    """
+    year = movie["year"]
+    return int(year) if year.isdigit() else 0
+
+
+def movie_years(movies):
+    """
+    Returns an array of the years of movie records, in order.
+    """
+    return array("i", map(movie_year, movies))
+
+
+def compress(num_rows, rows, cols):
+    """
+    Groups parallel `rows`/`cols` arrays by row.
+
+    Returns (offsets, index) arrays where the sorted, distinct columns
+    of row `r` are `index[offsets[r]:offsets[r + 1]]`.
+    """
+    # Count entries per row, then turn the counts into start offsets
+    offsets = array("q", bytes(8 * (num_rows + 1)))
+    for row in rows:
+        offsets[row + 1] += 1
+    for row in range(num_rows):
+        offsets[row + 1] += offsets[row]
+
+    # Scatter each column into its row's slot
+    cursor = array("q", offsets)
+    index = array("i", bytes(4 * len(rows)))
+    for row, col in zip(rows, cols):
+        index[cursor[row]] = col
+        cursor[row] += 1
+
+    # Sort each row and squeeze out duplicates in place
+    write = 0
+    start = 0
+    for row in range(num_rows):
+        end = offsets[row + 1]
+        offsets[row] = write
+        for col in sorted(set(index[start:end])):
+            index[write] = col
+            write += 1
+        start = end
+    offsets[num_rows] = write
+    del index[write:]
+
+    return offsets, index
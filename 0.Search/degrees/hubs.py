@@ -0,0 +1,282 @@
+"""
+Precomputed breadth-first searches from a few hub people.
+
+For every hub the index stores each person's distance from the hub and
+the (person, movie) that first reached them, so distances are a lookup
+and paths are rebuilt by following parents. The hubs also serve as
+landmarks that bound the distance between any two people for A*.
+
+The index file records a fingerprint of the dataset it was built from,
+and is only loaded for the same dataset.
+
+Usage: python hubs.py directory output hub_id [hub_id ...]
+"""
+
+import json
+import mmap
+import struct
+import sys
+from array import array
+
+import degrees
+from util import Node, PriorityFrontier
+
+MAGIC = b"DEGHUBS\0"
+VERSION = 2
+
+# magic, version, number of people, number of hubs, JSON metadata length
+HEADER = struct.Struct("<8sIqqq")
+
+UNREACHED = -1
+
+
+def search_from(graph, hub):
+    """
+    Runs a breadth-first search from a person index.
+
+    Returns (distances, parent_people, parent_movies) arrays indexed by
+    person, with UNREACHED for people in other components.
+    """
+    person_offsets = graph.person_offsets
+    person_movies = graph.person_movies
+    movie_offsets = graph.movie_offsets
+    movie_people = graph.movie_people
+
+    distances = array("i", [UNREACHED]) * graph.num_people()
+    parent_people = array("i", [UNREACHED]) * graph.num_people()
+    parent_movies = array("i", [UNREACHED]) * graph.num_people()
+    expanded_movies = bytearray(graph.num_movies())
+
+    distances[hub] = 0
+    layer = [hub]
+    depth = 0
+    while layer:
+        depth += 1
+        next_layer = []
+        for person in layer:
+            for i in range(person_offsets[person], person_offsets[person + 1]):
+                movie = person_movies[i]
+                if expanded_movies[movie]:
+                    continue
+                expanded_movies[movie] = 1
+                for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                    costar = movie_people[j]
+                    if distances[costar] == UNREACHED:
+                        distances[costar] = depth
+                        parent_people[costar] = person
+                        parent_movies[costar] = movie
+                        next_layer.append(costar)
+        layer = next_layer
+
+    return distances, parent_people, parent_movies
+
+
+def fingerprint(graph, source=None):
+    """
+    Returns a dictionary identifying a graph and, if it is given, the
+    source_key of the CSV files it was loaded from, as in degrees.source.
+    """
+    return {
+        "source": None if source is None else source.decode(),
+        "people": graph.num_people(),
+        "movies": graph.num_movies(),
+        "credits": len(graph.movie_people),
+    }
+
+
+class HubIndex:
+    """
+    Distance and parent arrays for a list of hub person ids.
+
+    `fingerprint` identifies the dataset the arrays were built from.
+    """
+
+    def __init__(
+        self, graph, hubs, distances, parent_people, parent_movies, fingerprint
+    ):
+        self.graph = graph
+        self.hubs = hubs
+        self.fingerprint = fingerprint
+        self.hub_index = {hub: i for i, hub in enumerate(hubs)}
+        self.distances = distances
+        self.parent_people = parent_people
+        self.parent_movies = parent_movies
+
+    @classmethod
+    def build(cls, graph, hubs, source=None):
+        """
+        Searches the whole graph once from every hub person id.
+
+        Give the `source` key the graph was loaded with, degrees.source,
+        so that the index is tied to the state of its CSV files.
+        """
+        searches = [search_from(graph, graph.person_index[hub]) for hub in hubs]
+        return cls(
+            graph,
+            list(hubs),
+            [search[0] for search in searches],
+            [search[1] for search in searches],
+            [search[2] for search in searches],
+            fingerprint(graph, source),
+        )
+
+    def save(self, filename):
+        """
+        Writes the index arrays to `filename`.
+        """
+        metadata = json.dumps({"hubs": self.hubs, "fingerprint": self.fingerprint})
+        metadata = metadata.encode()
+        metadata += b" " * (-len(metadata) % 8)
+        with open(filename, "wb") as f:
+            f.write(
+                HEADER.pack(
+                    MAGIC,
+                    VERSION,
+                    self.graph.num_people(),
+                    len(self.hubs),
+                    len(metadata),
+                )
+            )
+            f.write(metadata)
+            for arrays in (self.distances, self.parent_people, self.parent_movies):
+                for values in arrays:
+                    f.write(memoryview(values).cast("B"))
+
+    @classmethod
+    def load(cls, graph, filename, source=None):
+        """
+        Maps an index written by `save` for the same graph, loaded with
+        the same `source` key if it was built with one.
+
+        Raises ValueError if the index was built for another dataset.
+        """
+        with open(filename, "rb") as f:
+            view = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        magic, version, num_people, num_hubs, metadata_length = HEADER.unpack_from(
+            view
+        )
+        if (magic, version) != (MAGIC, VERSION):
+            raise ValueError(f"{filename} is not a hub index")
+        offset = HEADER.size
+        metadata = json.loads(bytes(view[offset : offset + metadata_length]))
+        offset += metadata_length
+        expected = fingerprint(graph, source)
+        if num_people != graph.num_people() or metadata["fingerprint"] != expected:
+            raise ValueError(f"{filename} was built for a different dataset")
+
+        size = 4 * num_people
+        arrays = []
+        for _ in range(3):
+            arrays.append([])
+            for _ in range(num_hubs):
+                arrays[-1].append(view[offset : offset + size].cast("i"))
+                offset += size
+        return cls(graph, metadata["hubs"], *arrays, expected)
+
+    def distance(self, hub, person_id):
+        """
+        Returns the degrees of separation between a hub and a person,
+        or None if they are not connected.
+        """
+        distances = self.distances[self.hub_index[hub]]
+        distance = distances[self.graph.person_index[person_id]]
+        return None if distance == UNREACHED else distance
+
+    def path(self, hub, person_id):
+        """
+        Returns the list of (movie_id, person_id) pairs from a hub
+        to a person, or None if they are not connected.
+        """
+        h = self.hub_index[hub]
+        parent_people = self.parent_people[h]
+        parent_movies = self.parent_movies[h]
+        person = self.graph.person_index[person_id]
+        if self.distances[h][person] == UNREACHED:
+            return None
+
+        path = []
+        while parent_people[person] != UNREACHED:
+            path.append(
+                (
+                    self.graph.movie_ids[parent_movies[person]],
+                    self.graph.person_ids[person],
+                )
+            )
+            person = parent_people[person]
+        path.reverse()
+        return path
+
+    def lower_bound(self, source, target):
+        """
+        Returns a lower bound on the distance between two person indexes,
+        or None if some hub proves they are not connected.
+        """
+        bound = 0
+        for distances in self.distances:
+            source_distance = distances[source]
+            target_distance = distances[target]
+            if (source_distance == UNREACHED) != (target_distance == UNREACHED):
+                return None
+            bound = max(bound, abs(source_distance - target_distance))
+        return bound
+
+    def astar_path(self, source_id, target_id):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs that
+        connect two people, searching with A* guided by hub distances.
+
+        If no possible path, returns None.
+        """
+        graph = self.graph
+        source = graph.person_index[source_id]
+        target = graph.person_index[target_id]
+        bound = self.lower_bound(source, target)
+        if bound is None:
+            return None
+
+        frontier = PriorityFrontier()
+        frontier.add(Node(state=source, parent=None, action=None), bound)
+        cost = {source: 0}
+        explored = set()
+
+        while not frontier.empty():
+            node = frontier.remove()
+            if node.state in explored:
+                continue
+            if node.state == target:
+                path = []
+                while node.parent is not None:
+                    path.append(
+                        (graph.movie_ids[node.action], graph.person_ids[node.state])
+                    )
+                    node = node.parent
+                path.reverse()
+                return path
+            explored.add(node.state)
+
+            child_cost = cost[node.state] + 1
+            for movie, person in graph.neighbors(node.state):
+                if person in explored or cost.get(person, child_cost + 1) <= child_cost:
+                    continue
+                bound = self.lower_bound(person, target)
+                if bound is None:
+                    continue
+                cost[person] = child_cost
+                child = Node(state=person, parent=node, action=movie)
+                frontier.add(child, child_cost + bound)
+
+        return None
+
+
+def main():
+    if len(sys.argv) < 4:
+        sys.exit("Usage: python hubs.py directory output hub_id [hub_id ...]")
+
+    degrees.load_data(sys.argv[1])
+    index = HubIndex.build(degrees.graph, sys.argv[3:], degrees.source)
+    index.save(sys.argv[2])
+    print(f"Saved distances from {len(index.hubs)} hubs to {sys.argv[2]}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Instrumentation sinks for the degrees search.
+
+A sink receives one `begin` and one `end` call per search and one
+`layer` call per expanded frontier layer. Sinks that set `node` also
+get a call for every newly reached person; the others add nothing to
+the inner loop of the search.
+"""
+
+import sys
+import time
+from collections import namedtuple
+
+QueryStats = namedtuple(
+    "QueryStats",
+    [
+        "source",
+        "target",
+        "degrees",
+        "nodes_explored",
+        "nodes_added",
+        "frontier_peak",
+        "branching_factor",
+        "seconds",
+    ],
+)
+
+
+class NullSink:
+    """
+    Ignores every event.
+    """
+
+    # Called as node(direction, person_id, movie_id, parent_id), if set
+    node = None
+
+    def begin(self, source, target):
+        pass
+
+    def layer(self, direction, explored, added, frontier_size):
+        pass
+
+    def end(self, path):
+        pass
+
+
+class CounterSink(NullSink):
+    """
+    Keeps a QueryStats record for every search.
+    """
+
+    def __init__(self):
+        self.queries = []
+
+    def begin(self, source, target):
+        self.current = [source, target, 0, 0, 0]
+        self.start = time.perf_counter()
+
+    def layer(self, direction, explored, added, frontier_size):
+        current = self.current
+        current[2] += explored
+        current[3] += added
+        current[4] = max(current[4], frontier_size)
+
+    def end(self, path):
+        seconds = time.perf_counter() - self.start
+        source, target, explored, added, peak = self.current
+        self.queries.append(
+            QueryStats(
+                source,
+                target,
+                None if path is None else len(path),
+                explored,
+                added,
+                peak,
+                added / explored if explored else 0.0,
+                seconds,
+            )
+        )
+        return self.queries[-1]
+
+    def summary(self):
+        """
+        Returns totals and averages over all recorded searches.
+        """
+        count = len(self.queries)
+        explored = sum(query.nodes_explored for query in self.queries)
+        added = sum(query.nodes_added for query in self.queries)
+        peak = max((query.frontier_peak for query in self.queries), default=0)
+        seconds = sorted(query.seconds for query in self.queries)
+        return {
+            "queries": count,
+            "nodes_explored": explored,
+            "frontier_peak": peak,
+            "branching_factor": added / explored if explored else 0.0,
+            "mean_seconds": sum(seconds) / count if count else 0.0,
+            "max_seconds": seconds[-1] if seconds else 0.0,
+        }
+
+
+class TraceSink(CounterSink):
+    """
+    Writes a line for every reached person, every layer and every search.
+    """
+
+    def __init__(self, stream=None):
+        super().__init__()
+        self.stream = sys.stderr if stream is None else stream
+
+    def begin(self, source, target):
+        print(f"Searching from {source} to {target}", file=self.stream)
+        super().begin(source, target)
+
+    def node(self, direction, person_id, movie_id, parent_id):
+        print(
+            f"{direction}: reached {person_id} from {parent_id} in movie {movie_id}",
+            file=self.stream,
+        )
+
+    def layer(self, direction, explored, added, frontier_size):
+        super().layer(direction, explored, added, frontier_size)
+        print(
+            f"{direction}: explored {explored}, added {added},"
+            f" frontier {frontier_size}",
+            file=self.stream,
+        )
+
+    def end(self, path):
+        stats = super().end(path)
+        print(
+            f"Done: {stats.degrees} degrees, explored {stats.nodes_explored},"
+            f" frontier peak {stats.frontier_peak},"
+            f" branching {stats.branching_factor:.2f},"
+            f" {stats.seconds * 1000:.3f} ms",
+            file=self.stream,
+        )
+        return stats
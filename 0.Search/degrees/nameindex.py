@@ -0,0 +1,180 @@
+"""
+Prefix and typo-tolerant lookups over the lowercase names of people.
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import chain, compress, islice
+from operator import eq
+
+# Rare trigrams a fuzzy match must share with the query before the
+# other trigrams are looked up
+SHARED_TRIGRAMS = 3
+
+
+class NameIndex:
+    """
+    Sorted list of names for prefix search, plus an inverted index from
+    each trigram to the names containing it.
+
+    The postings hold ranks in `by_length`, the names sorted by length,
+    so the names of any range of lengths are one run of every posting.
+    """
+
+    def __init__(self, names):
+        self.names = sorted(names)
+        self.by_length = sorted(self.names, key=len)
+        lengths = [len(name) for name in self.by_length]
+        longest = lengths[-1] if lengths else 0
+        self.length_ranks = array(
+            "i", (bisect_left(lengths, length) for length in range(longest + 2))
+        )
+        postings = {}
+        for rank, name in enumerate(self.by_length):
+            for trigram in trigrams(name):
+                postings.setdefault(trigram, []).append(rank)
+        self.postings = {
+            trigram: array("i", ranks) for trigram, ranks in postings.items()
+        }
+
+    def complete(self, prefix, limit=10):
+        """
+        Returns up to `limit` names starting with `prefix`, in order.
+        """
+        prefix = prefix.lower()
+        matches = []
+        position = bisect_left(self.names, prefix)
+        while (
+            len(matches) < limit
+            and position < len(self.names)
+            and self.names[position].startswith(prefix)
+        ):
+            matches.append(self.names[position])
+            position += 1
+        return matches
+
+    def search(self, query, limit=5, max_distance=1):
+        """
+        Returns up to `limit` (name, edit distance) pairs for the names
+        within `max_distance` edits of `query`, closest first.
+
+        Queries too short for their trigrams to rule out any name, with
+        no more than 3 * max_distance of them, are checked against every
+        name of a close enough length. Each extra edit allowed lets three
+        more trigrams differ, so far more candidates are checked at
+        max_distance=2 than at the default of 1.
+        """
+        query = query.lower()
+        query_trigrams = trigrams(query)
+
+        # Only names within `max_distance` of the query's length can match
+        low = self.rank_of_length(len(query) - max_distance)
+        high = self.rank_of_length(len(query) + max_distance + 1)
+
+        # One edit changes at most three trigrams, so a name within
+        # `max_distance` edits shares all but 3 * max_distance of them
+        required = len(query_trigrams) - 3 * max_distance
+        if required <= 0:
+            candidates = range(low, high)
+        else:
+            postings = []
+            for trigram in query_trigrams:
+                ranks = self.postings.get(trigram, ())
+                postings.append(
+                    ranks[bisect_left(ranks, low) : bisect_left(ranks, high)]
+                )
+            candidates = shared_ranks(postings, required)
+
+        matches = []
+        for rank in candidates:
+            name = self.by_length[rank]
+            distance = edit_distance(query, name, max_distance)
+            if distance <= max_distance:
+                matches.append((distance, name))
+        matches.sort()
+        return [(name, distance) for distance, name in matches[:limit]]
+
+    def rank_of_length(self, length):
+        """
+        Returns the rank of the first name at least `length` long.
+        """
+        length = max(0, min(length, len(self.length_ranks) - 1))
+        return self.length_ranks[length]
+
+
+def shared_ranks(postings, required):
+    """
+    Returns the ranks found in at least `required` of the sorted arrays
+    in `postings`.
+
+    A rank missing from no more than len(postings) - required arrays is
+    in at least `seed` of the len(postings) - required + seed shortest.
+    Those are merged and only the ranks repeated `seed` times are kept,
+    then looked up in the longer arrays by binary search.
+    """
+    postings = sorted(postings, key=len)
+    seed = min(required, SHARED_TRIGRAMS)
+    allowed = len(postings) - required
+    short = postings[: allowed + seed]
+    long = postings[allowed + seed :]
+
+    # In the merged ranks, a rank equal to the one seed - 1 places on
+    # appears at least seed times
+    merged = sorted(chain.from_iterable(short))
+    repeated = set(compress(merged, map(eq, merged, islice(merged, seed - 1, None))))
+
+    candidates = []
+    for rank in repeated:
+        missing = len(short) - bisect_right(merged, rank) + bisect_left(merged, rank)
+        for ranks in long:
+            i = bisect_left(ranks, rank)
+            if i == len(ranks) or ranks[i] != rank:
+                missing += 1
+                if missing > allowed:
+                    break
+        else:
+            candidates.append(rank)
+    return candidates
+
+
+def trigrams(name):
+    """
+    Returns the set of three-letter substrings of a padded name.
+    """
+    padded = f"  {name} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b, bound):
+    """
+    Returns the Levenshtein distance between two strings,
+    or bound + 1 as soon as it is known to exceed `bound`.
+
+    Only the diagonal band of width 2 * bound + 1 is filled in,
+    since cells outside it already cost more than `bound`.
+    """
+    if abs(len(a) - len(b)) > bound:
+        return bound + 1
+    over = bound + 1
+    previous = [j if j <= bound else over for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        current = [over] * (len(b) + 1)
+        if i <= bound:
+            current[0] = i
+        a_char = a[i - 1]
+        low = max(1, i - bound)
+        high = min(len(b), i + bound)
+        row_min = current[low - 1]
+        for j in range(low, high + 1):
+            cost = previous[j - 1] + (a_char != b[j - 1])
+            if previous[j] + 1 < cost:
+                cost = previous[j] + 1
+            if current[j - 1] + 1 < cost:
+                cost = current[j - 1] + 1
+            current[j] = cost
+            if cost < row_min:
+                row_min = cost
+        if row_min > bound:
+            return over
+        previous = current
+    return min(previous[-1], over)
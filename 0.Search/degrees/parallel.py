@@ -0,0 +1,240 @@
+"""
+Bidirectional breadth-first search split across a process pool.
+
+The CSR arrays of the graph and, for each direction, the reached flags
+of people and the expanded flags of movies live in shared memory. The
+search grows the side with the smaller frontier one layer at a time, as
+degrees.bidirectional_search does, and big layers are cut into chunks
+that the workers expand in parallel.
+
+Workers set the flags themselves as they reach people and expand movies,
+so every person is reported by at most one chunk and the parent only
+folds each chunk's (costar, movie, parent) arrays into its parent map.
+Two workers may both see a flag unset and report the same person, in
+which case either link is a valid shortest-path parent.
+"""
+
+import multiprocessing
+import os
+from array import array
+from multiprocessing import shared_memory
+
+# Typecodes of the graph arrays copied into shared memory
+ARRAYS = {
+    "person_offsets": "q",
+    "person_movies": "i",
+    "movie_offsets": "q",
+    "movie_people": "i",
+}
+
+# Flags kept in shared memory for each direction, sized by people or movies
+FLAGS = {
+    "forward_reached": "people",
+    "backward_reached": "people",
+    "forward_expanded": "movies",
+    "backward_expanded": "movies",
+}
+
+# Layers with fewer people than this are expanded in the parent
+MIN_PARALLEL_LAYER = 2048
+
+# Shared views of the one ParallelSearch a pool worker belongs to
+worker_views = {}
+
+
+def attach(blocks):
+    """
+    Pool initializer that maps the shared blocks of a ParallelSearch
+    into the worker.
+    """
+    for name, (block_name, typecode, length) in blocks.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        worker_views[name] = block.buf.cast(typecode)[:length]
+        worker_views[f"{name}_block"] = block
+
+
+def expand_chunk(task):
+    """
+    Expands a (people, direction) chunk of a layer in a pool worker.
+    """
+    people, direction = task
+    return expand(worker_views, people, direction)
+
+
+def expand(views, people, direction):
+    """
+    Expands part of a layer in `direction` against the shared `views`.
+
+    Returns arrays of the newly reached people and of the movie and
+    parent that reached each, and the first of them that the other
+    direction has already reached, or None. Expansion stops at that
+    person.
+    """
+    other = "backward" if direction == "forward" else "forward"
+    person_offsets = views["person_offsets"]
+    person_movies = views["person_movies"]
+    movie_offsets = views["movie_offsets"]
+    movie_people = views["movie_people"]
+    reached = views[f"{direction}_reached"]
+    expanded = views[f"{direction}_expanded"]
+    other_reached = views[f"{other}_reached"]
+
+    costars = array("i")
+    movies = array("i")
+    parents = array("i")
+    for person in people:
+        for i in range(person_offsets[person], person_offsets[person + 1]):
+            movie = person_movies[i]
+            if expanded[movie]:
+                continue
+            expanded[movie] = 1
+            for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                costar = movie_people[j]
+                if reached[costar]:
+                    continue
+                reached[costar] = 1
+                costars.append(costar)
+                movies.append(movie)
+                parents.append(person)
+                if other_reached[costar]:
+                    return costars, movies, parents, costar
+    return costars, movies, parents, None
+
+
+class ParallelSearch:
+    """
+    Pool of workers searching one CoStarGraph.
+
+    Every instance has its own shared memory and pool. Use as a context
+    manager, or call close() to stop the workers and free the shared
+    memory.
+    """
+
+    def __init__(self, graph, workers=None, min_parallel_layer=MIN_PARALLEL_LAYER):
+        self.graph = graph
+        self.workers = workers or os.cpu_count()
+        self.min_parallel_layer = min_parallel_layer
+
+        # Copy the graph and fresh flags into shared memory
+        self.empty = {
+            "people": bytes(graph.num_people()),
+            "movies": bytes(graph.num_movies()),
+        }
+        sources = {name: getattr(graph, name) for name in ARRAYS}
+        for name, size in FLAGS.items():
+            sources[name] = self.empty[size]
+        self.blocks = []
+        self.views = {}
+        blocks = {}
+        for name, values in sources.items():
+            data = memoryview(values).cast("B")
+            block = shared_memory.SharedMemory(create=True, size=max(len(data), 1))
+            block.buf[: len(data)] = data
+            typecode = ARRAYS.get(name, "B")
+            length = len(data) // memoryview(values).itemsize
+            self.blocks.append(block)
+            blocks[name] = (block.name, typecode, length)
+            self.views[name] = block.buf.cast(typecode)[:length]
+
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("fork" if "fork" in methods else None)
+        self.pool = context.Pool(self.workers, attach, (blocks,))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.pool.terminate()
+        self.pool.join()
+        for view in self.views.values():
+            view.release()
+        self.views = {}
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+    def shortest_path(self, source_id, target_id):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target.
+
+        If no possible path, returns None.
+        """
+        graph = self.graph
+        source = graph.person_index[str(source_id)]
+        target = graph.person_index[str(target_id)]
+        if source == target:
+            return []
+
+        # Each side maps every person it reached to its (movie, parent)
+        links = {"forward": {source: None}, "backward": {target: None}}
+        frontiers = {"forward": array("i", [source]), "backward": array("i", [target])}
+        self.views["forward_reached"][source] = 1
+        self.views["backward_reached"][target] = 1
+        try:
+            meeting = None
+            while meeting is None and frontiers["forward"] and frontiers["backward"]:
+                if len(frontiers["forward"]) <= len(frontiers["backward"]):
+                    direction = "forward"
+                else:
+                    direction = "backward"
+                meeting, layer = self.expand_layer(frontiers[direction], direction)
+                links[direction].update(layer)
+                frontiers[direction] = array("i", layer)
+        finally:
+            # Clear every flag at C speed rather than one by one
+            for name, size in FLAGS.items():
+                self.views[name][:] = self.empty[size]
+
+        if meeting is None:
+            return None
+
+        # Walk from the meeting person back to the source, then on to the target
+        path = []
+        person = meeting
+        while links["forward"][person] is not None:
+            movie, parent = links["forward"][person]
+            path.append((movie, person))
+            person = parent
+        path.reverse()
+        person = meeting
+        while links["backward"][person] is not None:
+            movie, parent = links["backward"][person]
+            path.append((movie, parent))
+            person = parent
+        return [
+            (graph.movie_ids[movie], graph.person_ids[person])
+            for movie, person in path
+        ]
+
+    def expand_layer(self, frontier, direction):
+        """
+        Expands a whole frontier in `direction`, in the workers if it is
+        big enough.
+
+        Returns the person where the two sides met, or None, and a dict
+        of every newly reached person to its (movie, parent).
+        """
+        if len(frontier) < self.min_parallel_layer:
+            results = [expand(self.views, frontier, direction)]
+        else:
+            size = -(-len(frontier) // self.workers)
+            results = self.pool.map(
+                expand_chunk,
+                [
+                    (frontier[i : i + size], direction)
+                    for i in range(0, len(frontier), size)
+                ],
+            )
+
+        layer = {}
+        meeting = None
+        for costars, movies, parents, found in results:
+            layer.update(zip(costars, zip(movies, parents)))
+            if meeting is None:
+                meeting = found
+        return meeting, layer
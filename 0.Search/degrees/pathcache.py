@@ -0,0 +1,103 @@
+"""
+Bounded LRU cache of shortest paths between pairs of people.
+"""
+
+from collections import OrderedDict, namedtuple
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+# Returned by get when the cache cannot answer a query
+MISSING = object()
+
+
+class PathCache:
+    """
+    Caches shortest paths under the unordered pair of their endpoints.
+
+    A path is stored once as its people and the movies linking them, so
+    it answers the query in both directions. Every stretch of a shortest
+    path is itself a shortest path, so a query whose two people both lie
+    on a cached path is answered by slicing it.
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.clear()
+
+    def clear(self, graph=None):
+        """
+        Forgets every path and resets the counters.
+
+        The cache then only serves the given graph.
+        """
+        self.graph = graph
+        # Maps a sorted (person_id, person_id) pair to (people, movies) or None
+        self.paths = OrderedDict()
+        # Maps a person_id to the keys of the cached paths it lies on
+        self.members = {}
+        self.hits = 0
+        self.misses = 0
+
+    def cache_info(self):
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self.paths))
+
+    def get(self, source, target):
+        """
+        Returns the cached list of (movie_id, person_id) pairs from
+        source to target, None if they are known not to be connected,
+        or MISSING.
+        """
+        key = (source, target) if source <= target else (target, source)
+        if key in self.paths:
+            self.paths.move_to_end(key)
+            entry = self.paths[key]
+        else:
+            # Look for a cached path going through both people
+            source_keys = self.members.get(source)
+            target_keys = self.members.get(target)
+            if source_keys and target_keys:
+                key = next(iter(source_keys & target_keys), None)
+            else:
+                key = None
+            if key is None:
+                self.misses += 1
+                return MISSING
+            self.paths.move_to_end(key)
+            entry = self.paths[key]
+
+        self.hits += 1
+        if entry is None:
+            return None
+        people, movies = entry
+        i = people.index(source)
+        j = people.index(target)
+        if i <= j:
+            return [(movies[t], people[t + 1]) for t in range(i, j)]
+        return [(movies[t - 1], people[t - 1]) for t in range(i, j, -1)]
+
+    def put(self, source, target, path):
+        """
+        Stores the path returned by a search from source to target.
+        """
+        key = (source, target) if source <= target else (target, source)
+        if key in self.paths:
+            return
+        if path is None:
+            entry = None
+        else:
+            people = (source,) + tuple(person_id for _, person_id in path)
+            movies = tuple(movie_id for movie_id, _ in path)
+            entry = (people, movies)
+            for person_id in people:
+                self.members.setdefault(person_id, set()).add(key)
+        self.paths[key] = entry
+
+        # Evict the least recently used paths
+        while len(self.paths) > self.maxsize:
+            old_key, old_entry = self.paths.popitem(last=False)
+            if old_entry is not None:
+                for person_id in old_entry[0]:
+                    keys = self.members[person_id]
+                    keys.discard(old_key)
+                    if not keys:
+                        del self.members[person_id]
@@ -0,0 +1,316 @@
+"""
+Binary snapshot of a loaded degrees dataset.
+
+The snapshot sits next to the CSV files and is keyed by their
+modification time and size. Every part of it is an array read straight
+out of a memory map: the graph arrays, the movie years, and the text
+columns of people and movies. Records and id lookups are built from the
+columns on access, so a fresh snapshot loads without parsing or
+allocating anything per person or movie.
+"""
+
+import json
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Mapping, Sequence
+from itertools import accumulate
+
+from graph import CoStarGraph
+
+FILENAME = "degrees.snapshot"
+MAGIC = b"DEGREES\0"
+VERSION = 3
+SOURCES = ("people.csv", "movies.csv", "stars.csv")
+
+# Text columns, each stored as offsets into a block of UTF-8 bytes
+COLUMNS = (
+    "person_ids",
+    "person_names",
+    "person_births",
+    "movie_ids",
+    "movie_titles",
+    "movie_year_texts",
+)
+
+# Name and typecode of every array, in file order. The orders hold the
+# positions of people by id, of movies by id and of people by lowercase
+# name, sorted by their UTF-8 bytes so they can be binary searched.
+ARRAYS = (
+    ("person_offsets", "q"),
+    ("person_movies", "i"),
+    ("movie_offsets", "q"),
+    ("movie_people", "i"),
+    ("movie_years", "i"),
+    ("person_order", "i"),
+    ("movie_order", "i"),
+    ("name_order", "i"),
+) + tuple(
+    (f"{column}_{part}", typecode)
+    for column in COLUMNS
+    for part, typecode in (("offsets", "q"), ("data", "B"))
+)
+
+# magic, version, key length, length of each array
+HEADER = struct.Struct(f"<8sIq{len(ARRAYS)}q")
+
+
+def source_key(directory):
+    """
+    Returns the bytes identifying the current state of the CSV files.
+    """
+    key = []
+    for name in SOURCES:
+        stat = os.stat(os.path.join(directory, name))
+        key.append([name, stat.st_mtime_ns, stat.st_size])
+    return json.dumps(key).encode()
+
+
+def padding(length):
+    return -length % 8
+
+
+def encode_column(strings):
+    """
+    Returns the (offsets, data) arrays of a text column.
+    """
+    encoded = [string.encode() for string in strings]
+    offsets = array("q", accumulate(map(len, encoded), initial=0))
+    return offsets, b"".join(encoded)
+
+
+def sorted_order(keys):
+    """
+    Returns an array of the positions of `keys` in sorted order.
+    """
+    return array("i", sorted(range(len(keys)), key=keys.__getitem__))
+
+
+def save(directory, key, people, movies, graph):
+    """
+    Writes a snapshot of the loaded data into `directory`, under the
+    source_key the CSV files had before they were read.
+
+    Returns False if the snapshot could not be written.
+    """
+    person_records = list(people.values())
+    movie_records = list(movies.values())
+    columns = (
+        graph.person_ids,
+        [person["name"] for person in person_records],
+        [person["birth"] for person in person_records],
+        graph.movie_ids,
+        [movie["title"] for movie in movie_records],
+        [movie["year"] for movie in movie_records],
+    )
+    arrays = [
+        graph.person_offsets,
+        graph.person_movies,
+        graph.movie_offsets,
+        graph.movie_people,
+        graph.movie_years,
+        sorted_order([person_id.encode() for person_id in graph.person_ids]),
+        sorted_order([movie_id.encode() for movie_id in graph.movie_ids]),
+        sorted_order([name.lower().encode() for name in columns[1]]),
+    ]
+    for strings in columns:
+        arrays.extend(encode_column(strings))
+
+    path = os.path.join(directory, FILENAME)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, "wb") as f:
+            f.write(
+                HEADER.pack(
+                    MAGIC, VERSION, len(key), *(len(values) for values in arrays)
+                )
+            )
+            f.write(key + bytes(padding(len(key))))
+            for values in arrays:
+                data = memoryview(values).cast("B")
+                f.write(data)
+                f.write(bytes(padding(len(data))))
+        os.replace(temporary, path)
+    except OSError:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        return False
+    return True
+
+
+def load(directory, key):
+    """
+    Returns (names, people, movies, graph) from the snapshot in `directory`,
+    or None if there is no snapshot or it was not written under `key`,
+    the current source_key of the CSV files.
+    """
+    path = os.path.join(directory, FILENAME)
+    try:
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    view = memoryview(buffer)
+    if len(view) < HEADER.size:
+        return None
+    magic, version, key_length, *lengths = HEADER.unpack_from(view)
+    if (magic, version) != (MAGIC, VERSION):
+        return None
+    offset = HEADER.size
+    if bytes(view[offset : offset + key_length]) != key:
+        return None
+    offset += key_length + padding(key_length)
+
+    # Reject a snapshot that was cut short
+    sizes = [
+        length * struct.calcsize(typecode)
+        for (_, typecode), length in zip(ARRAYS, lengths)
+    ]
+    if len(view) != offset + sum(size + padding(size) for size in sizes):
+        return None
+
+    # Map each array onto the snapshot without copying it
+    arrays = {}
+    for (name, typecode), size in zip(ARRAYS, sizes):
+        arrays[name] = view[offset : offset + size].cast(typecode)
+        offset += size + padding(size)
+    columns = {
+        column: Column(arrays[f"{column}_offsets"], arrays[f"{column}_data"])
+        for column in COLUMNS
+    }
+
+    person_index = SortedIndex(columns["person_ids"], arrays["person_order"])
+    movie_index = SortedIndex(columns["movie_ids"], arrays["movie_order"])
+    graph = CoStarGraph(
+        columns["person_ids"],
+        columns["movie_ids"],
+        arrays["person_offsets"],
+        arrays["person_movies"],
+        arrays["movie_offsets"],
+        arrays["movie_people"],
+        arrays["movie_years"],
+        person_index,
+        movie_index,
+    )
+    people = Records(
+        person_index,
+        {"name": columns["person_names"], "birth": columns["person_births"]},
+    )
+    movies = Records(
+        movie_index,
+        {"title": columns["movie_titles"], "year": columns["movie_year_texts"]},
+    )
+    names = Names(columns["person_names"], columns["person_ids"], arrays["name_order"])
+    return names, people, movies, graph
+
+
+class Column(Sequence):
+    """
+    Strings of a text column, decoded on access, like CoStarGraph.person_ids.
+    """
+
+    def __init__(self, offsets, data):
+        self.offsets = offsets
+        self.data = data
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, position):
+        return str(self.encoded(position), "utf-8")
+
+    def __iter__(self):
+        for position in range(len(self)):
+            yield self[position]
+
+    def encoded(self, position):
+        """
+        Returns the UTF-8 bytes of the string at `position`.
+        """
+        if position < 0:
+            position += len(self)
+        if not 0 <= position < len(self):
+            raise IndexError(position)
+        return bytes(self.data[self.offsets[position] : self.offsets[position + 1]])
+
+
+class SortedIndex(Mapping):
+    """
+    Maps the strings of a Column to their positions, like
+    CoStarGraph.person_index, by binary search over their sorted `order`.
+    """
+
+    def __init__(self, column, order):
+        self.column = column
+        self.order = order
+
+    def __getitem__(self, string):
+        if isinstance(string, str):
+            encoded = string.encode()
+            i = bisect_left(self.order, encoded, key=self.column.encoded)
+            if i < len(self.order) and self.column.encoded(self.order[i]) == encoded:
+                return self.order[i]
+        raise KeyError(string)
+
+    def __iter__(self):
+        return iter(self.column)
+
+    def __len__(self):
+        return len(self.column)
+
+
+class Records(Mapping):
+    """
+    Maps ids to record dictionaries, like degrees.people and degrees.movies.
+    """
+
+    def __init__(self, index, fields):
+        self.index = index
+        self.fields = fields
+
+    def __getitem__(self, record_id):
+        position = self.index[record_id]
+        return {field: column[position] for field, column in self.fields.items()}
+
+    def __iter__(self):
+        return iter(self.index)
+
+    def __len__(self):
+        return len(self.index)
+
+
+class Names(Mapping):
+    """
+    Maps lowercase names to sets of person ids, like degrees.names.
+    """
+
+    def __init__(self, names, person_ids, order):
+        self.names = names
+        self.person_ids = person_ids
+        self.order = order
+
+    def lower(self, position):
+        return self.names[position].lower().encode()
+
+    def __getitem__(self, lower_name):
+        if isinstance(lower_name, str):
+            encoded = lower_name.encode()
+            low = bisect_left(self.order, encoded, key=self.lower)
+            high = bisect_right(self.order, encoded, low, key=self.lower)
+            if low < high:
+                return {self.person_ids[person] for person in self.order[low:high]}
+        raise KeyError(lower_name)
+
+    def __iter__(self):
+        previous = None
+        for person in self.order:
+            name = self.names[person].lower()
+            if name != previous:
+                yield name
+                previous = name
+
+    def __len__(self):
+        return sum(1 for _ in self)
@@ -0,0 +1,340 @@
+"""
+Out-of-core storage of a degrees dataset in an indexed SQLite file.
+
+The database holds the people, movies and credits of a CSV directory.
+SQLiteGraph answers the same questions as graph.CoStarGraph with batched
+indexed queries, keeping only a bounded cache of adjacency in memory.
+
+Usage: python sqlitestore.py directory database
+"""
+
+import csv
+import os
+import sqlite3
+import sys
+from collections import OrderedDict
+from collections.abc import Mapping
+
+SCHEMA = """
+CREATE TABLE people (
+    id INTEGER PRIMARY KEY,
+    imdb_id TEXT NOT NULL UNIQUE,
+    name TEXT,
+    lower_name TEXT,
+    birth TEXT
+);
+CREATE INDEX people_by_name ON people (lower_name);
+CREATE TABLE movies (
+    id INTEGER PRIMARY KEY,
+    imdb_id TEXT NOT NULL UNIQUE,
+    title TEXT,
+    year TEXT
+);
+CREATE TABLE stars (
+    person INTEGER NOT NULL,
+    movie INTEGER NOT NULL,
+    PRIMARY KEY (person, movie)
+) WITHOUT ROWID;
+CREATE INDEX stars_by_movie ON stars (movie, person);
+"""
+
+# Most ids bound to one query, well below SQLite's variable limit
+BATCH_SIZE = 500
+
+
+def read_rows(filename, columns):
+    """
+    Yields tuples holding the named columns of each row in a CSV file.
+    """
+    with open(filename, encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        positions = [header.index(column) for column in columns]
+        for row in reader:
+            if row:
+                yield tuple(row[i] for i in positions)
+
+
+def import_csv(directory, filename):
+    """
+    Creates the database `filename` from the CSV files in `directory`.
+    """
+    if os.path.exists(filename):
+        os.remove(filename)
+    connection = sqlite3.connect(filename)
+    with connection:
+        connection.executescript(SCHEMA)
+        connection.executemany(
+            "INSERT INTO people (imdb_id, name, lower_name, birth) VALUES (?, ?, ?, ?)"
+            " ON CONFLICT (imdb_id) DO UPDATE SET name = excluded.name,"
+            " lower_name = excluded.lower_name, birth = excluded.birth",
+            (
+                (person_id, name, name.lower(), birth)
+                for person_id, name, birth in read_rows(
+                    f"{directory}/people.csv", ("id", "name", "birth")
+                )
+            ),
+        )
+        connection.executemany(
+            "INSERT INTO movies (imdb_id, title, year) VALUES (?, ?, ?)"
+            " ON CONFLICT (imdb_id) DO UPDATE SET title = excluded.title,"
+            " year = excluded.year",
+            read_rows(f"{directory}/movies.csv", ("id", "title", "year")),
+        )
+
+        # Resolve credits to row ids inside SQLite, dropping unknown ids
+        connection.execute(
+            "CREATE TEMPORARY TABLE credits (person_id TEXT, movie_id TEXT)"
+        )
+        connection.executemany(
+            "INSERT INTO credits VALUES (?, ?)",
+            read_rows(f"{directory}/stars.csv", ("person_id", "movie_id")),
+        )
+        connection.execute(
+            "INSERT OR IGNORE INTO stars (person, movie)"
+            " SELECT people.id, movies.id FROM credits"
+            " JOIN people ON people.imdb_id = credits.person_id"
+            " JOIN movies ON movies.imdb_id = credits.movie_id"
+        )
+        connection.execute("DROP TABLE credits")
+    connection.close()
+
+
+class PageCache:
+    """
+    LRU cache of id tuples, bounded by the total number of ids held.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.size = 0
+        self.entries = OrderedDict()
+
+    def get(self, key):
+        values = self.entries.get(key)
+        if values is not None:
+            self.entries.move_to_end(key)
+        return values
+
+    def put(self, key, values):
+        if key in self.entries:
+            return
+        self.entries[key] = values
+        self.size += len(values)
+        while self.size > self.capacity and len(self.entries) > 1:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= len(evicted)
+
+
+class IdColumn:
+    """
+    Maps row ids of a table to IMDb ids, like CoStarGraph.person_ids.
+    """
+
+    def __init__(self, connection, table):
+        self.connection = connection
+        self.query = f"SELECT imdb_id FROM {table} WHERE id = ?"
+
+    def __getitem__(self, row_id):
+        row = self.connection.execute(self.query, (row_id,)).fetchone()
+        if row is None:
+            raise IndexError(row_id)
+        return row[0]
+
+
+class RowIndex(Mapping):
+    """
+    Maps IMDb ids to row ids of a table, like CoStarGraph.person_index.
+    """
+
+    def __init__(self, connection, table):
+        self.connection = connection
+        self.table = table
+
+    def __getitem__(self, imdb_id):
+        row = self.connection.execute(
+            f"SELECT id FROM {self.table} WHERE imdb_id = ?", (imdb_id,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(imdb_id)
+        return row[0]
+
+    def __iter__(self):
+        for (imdb_id,) in self.connection.execute(
+            f"SELECT imdb_id FROM {self.table} ORDER BY id"
+        ):
+            yield imdb_id
+
+    def __len__(self):
+        query = f"SELECT COUNT(*) FROM {self.table}"
+        return self.connection.execute(query).fetchone()[0]
+
+
+class Records(Mapping):
+    """
+    Maps IMDb ids to record dictionaries, like degrees.people and degrees.movies.
+    """
+
+    def __init__(self, connection, table, fields):
+        self.connection = connection
+        self.index = RowIndex(connection, table)
+        self.fields = fields
+        self.query = f"SELECT {', '.join(fields)} FROM {table} WHERE imdb_id = ?"
+
+    def __getitem__(self, imdb_id):
+        row = self.connection.execute(self.query, (imdb_id,)).fetchone()
+        if row is None:
+            raise KeyError(imdb_id)
+        return dict(zip(self.fields, row))
+
+    def __iter__(self):
+        return iter(self.index)
+
+    def __len__(self):
+        return len(self.index)
+
+
+class Names(Mapping):
+    """
+    Maps lowercase names to sets of person ids, like degrees.names.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __getitem__(self, lower_name):
+        person_ids = {
+            imdb_id
+            for (imdb_id,) in self.connection.execute(
+                "SELECT imdb_id FROM people WHERE lower_name = ?", (lower_name,)
+            )
+        }
+        if not person_ids:
+            raise KeyError(lower_name)
+        return person_ids
+
+    def __iter__(self):
+        for (lower_name,) in self.connection.execute(
+            "SELECT DISTINCT lower_name FROM people"
+        ):
+            yield lower_name
+
+    def __len__(self):
+        return self.connection.execute(
+            "SELECT COUNT(DISTINCT lower_name) FROM people"
+        ).fetchone()[0]
+
+
+class SQLiteGraph:
+    """
+    Co-star graph read from the database on demand.
+
+    People and movies are identified by their row ids. Adjacency read
+    from the database is kept in a PageCache of `cache_size` ids per side.
+    """
+
+    def __init__(self, connection, cache_size=1_000_000):
+        self.connection = connection
+        self.person_ids = IdColumn(connection, "people")
+        self.movie_ids = IdColumn(connection, "movies")
+        self.person_index = RowIndex(connection, "people")
+        self.movie_index = RowIndex(connection, "movies")
+        self.person_cache = PageCache(cache_size)
+        self.movie_cache = PageCache(cache_size)
+
+    def num_people(self):
+        return len(self.person_index)
+
+    def num_movies(self):
+        return len(self.movie_index)
+
+    def movies_of_many(self, people):
+        """
+        Returns a dictionary from each person to a tuple of their movies.
+        """
+        return self.fetch(
+            people,
+            self.person_cache,
+            "SELECT person, movie FROM stars WHERE person IN ({})",
+        )
+
+    def stars_of_many(self, movies):
+        """
+        Returns a dictionary from each movie to a tuple of its stars.
+        """
+        return self.fetch(
+            movies,
+            self.movie_cache,
+            "SELECT movie, person FROM stars WHERE movie IN ({})",
+        )
+
+    def fetch(self, keys, cache, query):
+        """
+        Looks up adjacency for many keys, querying only the cache misses
+        in batches of BATCH_SIZE.
+        """
+        found = {}
+        missing = []
+        for key in keys:
+            values = cache.get(key)
+            if values is None:
+                missing.append(key)
+            else:
+                found[key] = values
+
+        for start in range(0, len(missing), BATCH_SIZE):
+            batch = missing[start : start + BATCH_SIZE]
+            fetched = {key: [] for key in batch}
+            rows = self.connection.execute(
+                query.format(", ".join("?" * len(batch))), batch
+            )
+            for key, value in rows:
+                fetched[key].append(value)
+            for key, values in fetched.items():
+                values = tuple(values)
+                cache.put(key, values)
+                found[key] = values
+        return found
+
+    def movies_of(self, person):
+        return iter(self.movies_of_many([person])[person])
+
+    def stars_of(self, movie):
+        return iter(self.stars_of_many([movie])[movie])
+
+    def neighbors(self, person):
+        """
+        Yields (movie, person) row id pairs for everyone
+        who starred with a person, including the person.
+        """
+        movies = self.movies_of_many([person])[person]
+        stars = self.stars_of_many(movies)
+        for movie in movies:
+            for costar in stars[movie]:
+                yield movie, costar
+
+
+def open_database(filename, cache_size=1_000_000):
+    """
+    Returns (names, people, movies, graph) backed by the database `filename`.
+    """
+    connection = sqlite3.connect(
+        f"file:{filename}?mode=ro", uri=True, check_same_thread=False
+    )
+    return (
+        Names(connection),
+        Records(connection, "people", ("name", "birth")),
+        Records(connection, "movies", ("title", "year")),
+        SQLiteGraph(connection, cache_size),
+    )
+
+
+def main():
+    if len(sys.argv) != 3:
+        sys.exit("Usage: python sqlitestore.py directory database")
+    import_csv(sys.argv[1], sys.argv[2])
+    print(f"Imported {sys.argv[1]} into {sys.argv[2]}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,22 @@ import sys
 import importlib
 import pytest
 import os
+import shutil
+
+SMALL = os.path.join(os.path.dirname(__file__), "small")
+
+
+@pytest.fixture
+def small(tmp_path):
+    """
+    Returns a copy of the small dataset, so that loading it writes its
+    snapshot outside the source tree.
+    """
+    directory = tmp_path / "small"
+    directory.mkdir()
+    for name in ("people.csv", "movies.csv", "stars.csv"):
+        shutil.copy(os.path.join(SMALL, name), directory / name)
+    return str(directory)
 
 
 def test_main_small(monkeypatch):
@@ -37,3 +53,776 @@ def test_main_demi_to_tom(monkeypatch, capsys):
     assert "Tom Cruise" in captured.out
 
 
+def plain_bfs_length(degrees, source, target):
+    """
+    Reference breadth-first search from the source only.
+    """
+    from util import Node, QueueFrontier
+
+    frontier = QueueFrontier()
+    frontier.add(Node(state=source, parent=None, action=None))
+    depth = {source: 0}
+    while not frontier.empty():
+        node = frontier.remove()
+        if node.state == target:
+            return depth[target]
+        for _, person_id in degrees.neighbors_for_person(node.state):
+            if person_id not in depth:
+                depth[person_id] = depth[node.state] + 1
+                frontier.add(Node(state=person_id, parent=node, action=None))
+    return None
+
+
+def random_cast(monkeypatch, degrees, seed, num_people=60, num_movies=40):
+    """
+    Replace the loaded data with a random co-star graph.
+    """
+    import random
+    from array import array
+    from graph import CoStarGraph
+
+    rng = random.Random(seed)
+    person_ids = [str(i) for i in range(num_people)]
+    movie_ids = [f"m{m}" for m in range(num_movies)]
+    edge_people = array("i")
+    edge_movies = array("i")
+    for movie in range(num_movies):
+        for person in rng.sample(range(num_people), rng.randint(1, 4)):
+            edge_people.append(person)
+            edge_movies.append(movie)
+    graph = CoStarGraph.from_edges(person_ids, movie_ids, edge_people, edge_movies)
+    monkeypatch.setattr(degrees, "graph", graph)
+    return person_ids
+
+
+def assert_valid_path(degrees, source, target, path):
+    previous = source
+    for movie_id, person_id in path:
+        assert (movie_id, person_id) in degrees.neighbors_for_person(previous)
+        previous = person_id
+    assert previous == target
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_shortest_path_matches_plain_bfs(monkeypatch, seed):
+    import degrees
+
+    person_ids = random_cast(monkeypatch, degrees, seed)
+    for source in person_ids[::7]:
+        for target in person_ids[::5]:
+            path = degrees.shortest_path(source, target)
+            expected = plain_bfs_length(degrees, source, target)
+            if expected is None:
+                assert path is None
+            else:
+                assert len(path) == expected
+                assert_valid_path(degrees, source, target, path)
+
+
+def test_shortest_path_small(small):
+    import degrees
+
+    degrees.load_data(small)
+    # Kevin Bacon and Tom Hanks both starred in Apollo 13
+    assert degrees.shortest_path("102", "158") == [("112384", "158")]
+    # Demi Moore to Tom Hanks needs two movies
+    path = degrees.shortest_path("193", "158")
+    assert len(path) == 2
+    assert_valid_path(degrees, "193", "158", path)
+    # Emma Watson has no movies in the small dataset
+    assert degrees.shortest_path("102", "914612") is None
+    assert degrees.shortest_path("102", "102") == []
+
+
+def test_graph_deduplicates_credits():
+    from array import array
+    from graph import CoStarGraph
+
+    graph = CoStarGraph.from_edges(
+        ["a", "b", "c"],
+        ["x", "y"],
+        array("i", [0, 1, 0, 2, 0]),
+        array("i", [0, 0, 0, 1, 1]),
+    )
+    assert list(graph.movies_of(0)) == [0, 1]
+    assert list(graph.stars_of(0)) == [0, 1]
+    assert list(graph.stars_of(1)) == [0, 2]
+    assert sorted(graph.neighbors(2)) == [(1, 0), (1, 2)]
+
+
+def test_neighbors_for_person_small(small):
+    import degrees
+
+    degrees.load_data(small)
+    # Tom Cruise starred in A Few Good Men and Rain Man
+    assert degrees.neighbors_for_person("129") == {
+        ("104257", "102"),
+        ("104257", "129"),
+        ("104257", "193"),
+        ("104257", "197"),
+        ("95953", "129"),
+        ("95953", "163"),
+        ("95953", "420"),
+        ("95953", "596520"),
+    }
+
+
+def test_load_data_uses_fresh_snapshot(tmp_path):
+    import degrees
+
+    for name in ("people.csv", "movies.csv", "stars.csv"):
+        shutil.copy(os.path.join(SMALL, name), tmp_path / name)
+
+    # The first load parses the CSV files and writes the snapshot
+    degrees.load_data(str(tmp_path))
+    assert (tmp_path / "degrees.snapshot").exists()
+    parsed = degrees.shortest_path("193", "158")
+    parsed_data = (
+        dict(degrees.names),
+        dict(degrees.people),
+        dict(degrees.movies),
+        list(degrees.graph.movie_years),
+    )
+
+    # The second load maps the snapshot instead
+    degrees.load_data(str(tmp_path))
+    assert isinstance(degrees.graph.person_movies, memoryview)
+    assert (
+        dict(degrees.names),
+        dict(degrees.people),
+        dict(degrees.movies),
+        list(degrees.graph.movie_years),
+    ) == parsed_data
+    assert degrees.names["tom hanks"] == {"158"}
+    assert "nobody" not in degrees.people and "nobody" not in degrees.graph.person_index
+    assert degrees.graph.person_ids[degrees.graph.person_index["158"]] == "158"
+    assert degrees.shortest_path("193", "158") == parsed
+
+    # Changing a CSV file makes the snapshot stale
+    with open(tmp_path / "stars.csv", "a", encoding="utf-8") as f:
+        f.write("914612,112384\n")
+    degrees.load_data(str(tmp_path))
+    assert not isinstance(degrees.graph.person_movies, memoryview)
+    assert degrees.shortest_path("914612", "102") == [("112384", "102")]
+
+
+def test_snapshot_of_files_changed_while_parsing_is_stale(monkeypatch, tmp_path):
+    import degrees
+
+    for name in ("people.csv", "movies.csv", "stars.csv"):
+        shutil.copy(os.path.join(SMALL, name), tmp_path / name)
+
+    # A credit is added to the files after the parse has started
+    stream_data = degrees.stream_data
+
+    def changing_stream(*args):
+        steps = stream_data(*args)
+        yield next(steps)
+        with open(tmp_path / "stars.csv", "a", encoding="utf-8") as f:
+            f.write("914612,112384\n")
+        yield from steps
+
+    monkeypatch.setattr(degrees, "stream_data", changing_stream)
+    degrees.load_data(str(tmp_path))
+    monkeypatch.undo()
+
+    # The snapshot holds the old key, so the next load parses again
+    degrees.load_data(str(tmp_path))
+    assert not isinstance(degrees.graph.person_movies, memoryview)
+    assert degrees.shortest_path("914612", "102") == [("112384", "102")]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+@pytest.mark.parametrize("database", [False, True])
+def test_batch_writes_json_lines(tmp_path, small, workers, database):
+    import io
+    import json
+    import batch
+    import sqlitestore
+
+    if database:
+        sqlitestore.import_csv(small, str(tmp_path / "small.db"))
+        small = str(tmp_path / "small.db")
+    lines = [
+        "102,158\n",
+        "\n",
+        "193\t158\n",
+        "102\n",
+        "102,914612\n",
+        "102,1\n",
+    ]
+    out = io.StringIO()
+    batch.run(small, lines, out, workers=workers, chunksize=1)
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+
+    assert [(r.get("source"), r.get("target")) for r in records] == [
+        ("102", "158"),
+        ("193", "158"),
+        (None, None),
+        ("102", "914612"),
+        ("102", "1"),
+    ]
+    assert records[0]["path"] == [["112384", "158"]]
+    assert records[1]["degrees"] == 2
+    assert records[2] == {"line": "102", "error": "Expected source_id,target_id."}
+    assert records[3]["path"] is None
+    assert records[4]["error"] == "Person not found."
+
+
+def test_frontiers_track_membership():
+    from util import Node, PriorityFrontier, QueueFrontier, StackFrontier
+
+    nodes = [Node(state=state, parent=None, action=None) for state in "abca"]
+    removed = {}
+    for frontier_class in (StackFrontier, QueueFrontier, PriorityFrontier):
+        frontier = frontier_class()
+        for priority, node in zip([3, 1, 2, 0], nodes):
+            if frontier_class is PriorityFrontier:
+                frontier.add(node, priority)
+            else:
+                frontier.add(node)
+        assert len(frontier) == 4
+        order = []
+        while not frontier.empty():
+            assert frontier.contains_state(nodes[1].state) == ("b" not in order)
+            order.append(frontier.remove().state)
+        assert not frontier.contains_state("a")
+        removed[frontier_class] = "".join(order)
+        with pytest.raises(Exception):
+            frontier.remove()
+
+    assert removed == {
+        StackFrontier: "acba",
+        QueueFrontier: "abca",
+        PriorityFrontier: "abca",
+    }
+
+
+def test_hub_index_answers_without_search(monkeypatch, tmp_path):
+    import degrees
+    from hubs import HubIndex
+
+    person_ids = random_cast(monkeypatch, degrees, seed=7)
+    hubs = person_ids[:3]
+    index = HubIndex.build(degrees.graph, hubs)
+    index.save(tmp_path / "hubs.bin")
+    loaded = HubIndex.load(degrees.graph, tmp_path / "hubs.bin")
+
+    for hub in hubs:
+        for person_id in person_ids:
+            expected = plain_bfs_length(degrees, hub, person_id)
+            for hub_index in (index, loaded):
+                assert hub_index.distance(hub, person_id) == expected
+                path = hub_index.path(hub, person_id)
+                if expected is None:
+                    assert path is None
+                else:
+                    assert len(path) == expected
+                    assert_valid_path(degrees, hub, person_id, path)
+
+    # An index only loads for the dataset it was built from
+    random_cast(monkeypatch, degrees, seed=8)
+    with pytest.raises(ValueError, match="different dataset"):
+        HubIndex.load(degrees.graph, tmp_path / "hubs.bin")
+
+
+def test_hub_index_checks_source_files(tmp_path):
+    import degrees
+    from hubs import HubIndex
+
+    for name in ("people.csv", "movies.csv", "stars.csv"):
+        shutil.copy(os.path.join(SMALL, name), tmp_path / name)
+    degrees.load_data(str(tmp_path))
+    index = HubIndex.build(degrees.graph, ["102"], degrees.source)
+    index.save(tmp_path / "hubs.bin")
+    loaded = HubIndex.load(degrees.graph, tmp_path / "hubs.bin", degrees.source)
+    assert loaded.distance("102", "158") == 1
+
+    # Same numbers of people and movies, but the files changed
+    with open(tmp_path / "people.csv", "a", encoding="utf-8") as f:
+        f.write("\n")
+    degrees.load_data(str(tmp_path))
+    with pytest.raises(ValueError, match="different dataset"):
+        HubIndex.load(degrees.graph, tmp_path / "hubs.bin", degrees.source)
+
+
+def test_hub_index_astar_matches_plain_bfs(monkeypatch):
+    import degrees
+    from hubs import HubIndex
+
+    person_ids = random_cast(monkeypatch, degrees, seed=11)
+    index = HubIndex.build(degrees.graph, person_ids[::20])
+    for source in person_ids[::3]:
+        for target in person_ids[::4]:
+            expected = plain_bfs_length(degrees, source, target)
+            path = index.astar_path(source, target)
+            if expected is None:
+                assert path is None
+            else:
+                assert len(path) == expected
+                assert_valid_path(degrees, source, target, path)
+
+
+def test_path_cache_reuses_reverse_and_sub_paths():
+    from pathcache import MISSING, PathCache
+
+    cache = PathCache(maxsize=2)
+    path = [("m1", "b"), ("m2", "c"), ("m3", "d")]
+    assert cache.get("a", "d") is MISSING
+    cache.put("a", "d", path)
+
+    assert cache.get("a", "d") == path
+    assert cache.get("d", "a") == [("m3", "c"), ("m2", "b"), ("m1", "a")]
+    assert cache.get("b", "d") == [("m2", "c"), ("m3", "d")]
+    assert cache.get("c", "b") == [("m2", "b")]
+    assert cache.cache_info() == (4, 1, 2, 1)
+
+    # Unconnected pairs are cached too; the oldest path is evicted first
+    cache.put("x", "y", None)
+    cache.put("y", "z", [("m4", "z")])
+    assert cache.get("y", "x") is None
+    assert cache.get("b", "c") is MISSING
+    assert cache.members == {"y": {("y", "z")}, "z": {("y", "z")}}
+
+
+def test_shortest_path_cache_follows_loaded_data(tmp_path, small):
+    import degrees
+
+    degrees.load_data(small)
+    path = degrees.shortest_path("193", "158")
+    assert degrees.path_cache.cache_info().misses == 1
+    assert degrees.shortest_path(158, 193) == [
+        (path[1][0], path[0][1]),
+        (path[0][0], "193"),
+    ]
+    assert degrees.path_cache.cache_info().hits == 1
+
+    # Loading another directory starts from an empty cache
+    for name in ("people.csv", "movies.csv", "stars.csv"):
+        shutil.copy(os.path.join(SMALL, name), tmp_path / name)
+    with open(tmp_path / "stars.csv", "a", encoding="utf-8") as f:
+        f.write("193,112384\n")
+    degrees.load_data(str(tmp_path))
+    assert degrees.shortest_path("193", "158") == [("112384", "158")]
+    assert degrees.path_cache.cache_info() == (0, 1, 4096, 1)
+
+
+def test_load_data_streams_chunks_with_partial_graphs(monkeypatch, tmp_path):
+    import degrees
+
+    for name in ("people.csv", "movies.csv", "stars.csv"):
+        shutil.copy(os.path.join(SMALL, name), tmp_path / name)
+
+    reports = []
+    answers = []
+    monkeypatch.setattr(degrees, "graph", None)
+
+    def progress(filename, rows, rows_per_second):
+        reports.append((os.path.basename(filename), rows, degrees.graph is not None))
+        # Query whatever graph has been published so far
+        if filename.endswith("stars.csv") and "102" in degrees.graph.person_index:
+            answers.append(degrees.shortest_path("102", "158"))
+
+    degrees.load_data_in_background(str(tmp_path), 4, progress).join()
+
+    assert [report[:2] for report in reports[:4]] == [
+        ("people.csv", 4),
+        ("people.csv", 8),
+        ("people.csv", 12),
+        ("people.csv", 16),
+    ]
+    assert reports[-1][:2] == ("stars.csv", 20)
+    # Graphs are only published once credits are read
+    assert all(published == (name == "stars.csv") for name, _, published in reports)
+    assert None in answers
+    assert answers[-1] == [("112384", "158")]
+    assert degrees.graph.num_people() == 16
+    assert len(degrees.graph.person_movies) == 20
+
+
+def test_name_index_prefix_and_fuzzy_search():
+    from nameindex import NameIndex, edit_distance
+
+    index = NameIndex(["tom cruise", "tom hanks", "tim hanks", "kevin bacon", "t"])
+    assert index.complete("Tom ") == ["tom cruise", "tom hanks"]
+    assert index.complete("t", limit=2) == ["t", "tim hanks"]
+    assert index.complete("z") == []
+
+    assert index.search("tom hnaks") == []
+    assert index.search("tom hnaks", max_distance=2) == [("tom hanks", 2)]
+    assert index.search("tom hank", max_distance=2) == [
+        ("tom hanks", 1),
+        ("tim hanks", 2),
+    ]
+    assert index.search("Kevn Bacon") == [("kevin bacon", 1)]
+    assert index.search("xyz") == []
+    # Too short for trigrams, so every name of a close length is checked
+    assert index.search("tx") == [("t", 1)]
+    assert index.search("txy", max_distance=2) == [("t", 2)]
+    assert edit_distance("kitten", "sitting", 5) == 3
+    assert edit_distance("kitten", "sitting", 1) == 2
+
+
+def test_name_index_matches_brute_force():
+    import random
+    from nameindex import NameIndex, edit_distance
+
+    rng = random.Random(3)
+    names = {
+        "".join(rng.choice("abc ") for _ in range(rng.randint(1, 9)))
+        for _ in range(300)
+    }
+    index = NameIndex(names)
+    for _ in range(50):
+        query = "".join(rng.choice("abcd") for _ in range(rng.randint(1, 9)))
+        for max_distance in (1, 2):
+            expected = sorted(
+                (edit_distance(query, name, 99), name)
+                for name in names
+                if edit_distance(query, name, 99) <= max_distance
+            )
+            assert index.search(query, limit=1000, max_distance=max_distance) == [
+                (name, distance) for distance, name in expected
+            ]
+
+
+def test_degrees_name_lookups(small):
+    import degrees
+
+    # The index is built while loading, and the lookups reuse it
+    degrees.load_data(small, index_names=True)
+    index = degrees.name_index
+    assert index is not None
+    assert degrees.complete_names("Tom") == ["tom cruise", "tom hanks"]
+    assert degrees.similar_names("Demi Mooore") == [("demi moore", 1)]
+    assert degrees.name_index is index
+
+    # Also when the data comes from the snapshot
+    degrees.load_data(small)
+    assert degrees.name_index is None
+    degrees.load_data(small, index_names=True)
+    assert degrees.similar_names("Demi Mooore") == [("demi moore", 1)]
+
+
+def test_search_sinks_report_metrics(monkeypatch, small):
+    import io
+    import degrees
+    from instrument import CounterSink, NullSink, TraceSink
+
+    degrees.load_data(small)
+    counter = CounterSink()
+    monkeypatch.setattr(degrees, "sink", counter)
+    path = degrees.shortest_path("193", "158")
+    assert degrees.shortest_path("193", "158") == path
+    assert degrees.shortest_path("102", "914612") is None
+
+    # The cached repeat does not search again
+    assert len(counter.queries) == 2
+    stats = counter.queries[0]
+    assert (stats.source, stats.target, stats.degrees) == ("193", "158", 2)
+    assert stats.nodes_explored >= 2
+    assert stats.frontier_peak >= 1
+    assert stats.branching_factor == stats.nodes_added / stats.nodes_explored
+    assert counter.queries[1].degrees is None
+    assert counter.summary()["queries"] == 2
+
+    stream = io.StringIO()
+    monkeypatch.setattr(degrees, "sink", TraceSink(stream))
+    degrees.path_cache.clear()
+    degrees.shortest_path("193", "158")
+    lines = stream.getvalue().splitlines()
+    assert lines[0] == "Searching from 193 to 158"
+    assert "forward: reached 102 from 193 in movie 104257" in lines
+    assert lines[-1].startswith("Done: 2 degrees")
+
+    assert NullSink.node is None
+
+
+def test_sqlite_store_matches_in_memory_graph(tmp_path, small):
+    import degrees
+    import sqlitestore
+
+    degrees.load_data(small)
+    person_ids = sorted(degrees.people)
+    expected = {
+        (source, target): degrees.shortest_path(source, target)
+        for source in person_ids
+        for target in person_ids
+    }
+    expected_neighbors = degrees.neighbors_for_person("129")
+
+    database = str(tmp_path / "small.db")
+    sqlitestore.import_csv(small, database)
+    degrees.load_database(database, cache_size=4)
+    assert isinstance(degrees.graph, sqlitestore.SQLiteGraph)
+    assert degrees.person_id_for_name("Tom Hanks") == "158"
+    assert degrees.people["158"] == {"name": "Tom Hanks", "birth": "1956"}
+    assert degrees.movies["112384"]["title"] == "Apollo 13"
+    assert degrees.neighbors_for_person("129") == expected_neighbors
+    for (source, target), path in expected.items():
+        result = degrees.shortest_path(source, target)
+        if path is None:
+            assert result is None
+        else:
+            assert len(result) == len(path)
+            assert_valid_path(degrees, source, target, result)
+    assert degrees.graph.person_cache.size <= 4
+
+
+def simple_paths(degrees, source, target):
+    """
+    Reference enumeration of every simple path by depth-first search.
+    """
+    paths = []
+    stack = [(source, [], {source})]
+    while stack:
+        person, path, visited = stack.pop()
+        if person == target:
+            paths.append(path)
+            continue
+        for movie_id, person_id in degrees.neighbors_for_person(person):
+            if person_id not in visited:
+                stack.append(
+                    (person_id, path + [(movie_id, person_id)], visited | {person_id})
+                )
+    return paths
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_path_enumeration_matches_brute_force(monkeypatch, seed):
+    import degrees
+
+    person_ids = random_cast(monkeypatch, degrees, seed, num_people=9, num_movies=7)
+    for source in person_ids[:3]:
+        for target in person_ids[-3:]:
+            paths = simple_paths(degrees, source, target)
+            shortest = min((len(path) for path in paths), default=None)
+            expected = sorted(path for path in paths if len(path) == shortest)
+            assert sorted(degrees.all_shortest_paths(source, target)) == expected
+
+            yen = list(degrees.k_shortest_paths(source, target))
+            assert sorted(map(len, yen)) == [len(path) for path in yen]
+            assert sorted(yen) == sorted(paths)
+            assert list(degrees.k_shortest_paths(source, target, 2)) == yen[:2]
+            for k in (0, -1):
+                assert list(degrees.k_shortest_paths(source, target, k)) == []
+
+
+def test_all_shortest_paths_small(small):
+    import degrees
+
+    degrees.load_data(small)
+    assert list(degrees.all_shortest_paths("193", "158")) == [
+        [("104257", "102"), ("112384", "158")]
+    ]
+    assert list(degrees.all_shortest_paths("102", "914612")) == []
+    assert list(degrees.k_shortest_paths("102", "102", 3)) == [[]]
+
+
+@pytest.mark.parametrize("min_parallel_layer", [0, 10**9])
+def test_parallel_search_matches_plain_bfs(monkeypatch, min_parallel_layer):
+    import degrees
+    import parallel
+
+    person_ids = random_cast(monkeypatch, degrees, seed=5)
+    with parallel.ParallelSearch(degrees.graph, 2, min_parallel_layer) as search:
+        for source in person_ids[::6]:
+            for target in person_ids[::5]:
+                expected = plain_bfs_length(degrees, source, target)
+                path = search.shortest_path(source, target)
+                if expected is None:
+                    assert path is None
+                else:
+                    assert len(path) == expected
+                    assert_valid_path(degrees, source, target, path)
+        assert not any(any(search.views[name]) for name in parallel.FLAGS)
+
+
+def test_parallel_searches_are_independent(monkeypatch):
+    import degrees
+    import parallel
+
+    person_ids = random_cast(monkeypatch, degrees, seed=6)
+    source, target = person_ids[0], person_ids[-1]
+    expected = plain_bfs_length(degrees, source, target)
+    first = parallel.ParallelSearch(degrees.graph, 1, 0)
+    with parallel.ParallelSearch(degrees.graph, 2, 0) as second:
+        first.close()
+        path = second.shortest_path(source, target)
+        assert (path if path is None else len(path)) == expected
+
+
+def test_analytics_match_per_node_searches(monkeypatch):
+    pytest.importorskip("scipy")
+    import degrees
+    import analytics
+
+    person_ids = random_cast(monkeypatch, degrees, seed=2)
+    graph = degrees.graph
+
+    # Components and eccentricities from plain searches
+    distances = {
+        source: {
+            target: plain_bfs_length(degrees, source, target) for target in person_ids
+        }
+        for source in person_ids
+    }
+    components = {
+        frozenset(t for t, d in row.items() if d is not None)
+        for row in distances.values()
+    }
+    count, labels = analytics.connected_components(graph)
+    assert count == len(components)
+    for component in components:
+        assert len({labels[graph.person_index[p]] for p in component}) == 1
+    assert sorted(analytics.component_sizes(graph)) == sorted(map(len, components))
+
+    costars = analytics.costar_degrees(graph)
+    for person_id in person_ids:
+        expected = {p for _, p in degrees.neighbors_for_person(person_id)}
+        expected.discard(person_id)
+        assert costars[graph.person_index[person_id]] == len(expected)
+    assert list(analytics.costar_degrees(graph, block_entries=5)) == list(costars)
+    assert analytics.degree_distribution(graph).sum() == len(person_ids)
+
+    for person_id in person_ids:
+        person = graph.person_index[person_id]
+        distance, farthest = analytics.eccentricity(graph, person)
+        row = distances[person_id]
+        assert distance == max(d for d in row.values() if d is not None)
+        assert row[graph.person_ids[farthest]] == distance
+
+    largest = max(components, key=len)
+    diameter = max(distances[s][t] for s in largest for t in largest)
+    assert 0 < analytics.sampled_diameter(graph, samples=5) <= diameter
+
+
+def constrained_bfs_length(degrees, source, target, years, excluded):
+    """
+    Reference breadth-first search that filters every neighbor.
+    """
+    if source in excluded or target in excluded:
+        return None
+    depth = {source: 0}
+    layer = [source]
+    while layer and target not in depth:
+        next_layer = []
+        for person_id in layer:
+            for movie_id, costar in degrees.neighbors_for_person(person_id):
+                if (
+                    years(movie_id)
+                    and costar not in excluded
+                    and costar not in depth
+                ):
+                    depth[costar] = depth[person_id] + 1
+                    next_layer.append(costar)
+        layer = next_layer
+    return depth.get(target)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_constrained_shortest_path_matches_filtered_bfs(monkeypatch, seed):
+    import random
+    from array import array
+    import degrees
+
+    person_ids = random_cast(monkeypatch, degrees, seed, num_movies=60)
+    graph = degrees.graph
+    rng = random.Random(seed)
+    years = sorted(rng.choice([0, 1980, 1990, 1995, 2000, 2010]) for _ in range(60))
+    graph.movie_years = array("i", years)
+    year_of = {graph.movie_ids[m]: year for m, year in enumerate(years)}
+
+    for min_year, max_year, excluded in [
+        (1990, None, set()),
+        (None, 1995, set()),
+        (1990, 2000, set(person_ids[:3])),
+        (None, None, set(person_ids[3:8])),
+    ]:
+        def allowed(movie_id):
+            year = year_of[movie_id]
+            if min_year is None and max_year is None:
+                return True
+            return (
+                year != 0
+                and (min_year is None or year >= min_year)
+                and (max_year is None or year <= max_year)
+            )
+
+        for source in person_ids[::7]:
+            for target in person_ids[::5]:
+                path = degrees.shortest_path(
+                    source, target, min_year, max_year, excluded
+                )
+                expected = constrained_bfs_length(
+                    degrees, source, target, allowed, excluded
+                )
+                if expected is None:
+                    assert path is None
+                    continue
+                assert len(path) == expected
+                assert_valid_path(degrees, source, target, path)
+                for movie_id, person_id in path:
+                    assert allowed(movie_id)
+                    assert person_id not in excluded
+
+
+def test_constrained_shortest_path_small(small):
+    import degrees
+
+    degrees.load_data(small)
+    # Movies are interned in order of year
+    years = list(degrees.graph.movie_years)
+    assert years == sorted(years)
+    # Kevin Bacon and Tom Hanks only share Apollo 13, from 1995
+    assert degrees.shortest_path("102", "158", min_year=1995) == [("112384", "158")]
+    # Without it they are not connected
+    assert degrees.shortest_path("102", "158", max_year=1994) is None
+    # Cary Elwes reaches Tom Hanks through Robin Wright, 1987 and 1994
+    path = degrees.shortest_path("144", "158", min_year=1987, max_year=1994)
+    assert path == [("93779", "705"), ("109830", "158")]
+    assert degrees.shortest_path("144", "158", min_year=1990) is None
+    assert degrees.shortest_path("144", "158", excluded={"705"}) is None
+    assert degrees.shortest_path("102", "158", excluded={"158"}) is None
+    # Unknown people are ignored
+    path = degrees.shortest_path("144", "158", excluded={"nobody"})
+    assert path == [("93779", "705"), ("109830", "158")]
+
+
+def test_generate_is_deterministic_and_loads(tmp_path):
+    import csv
+    import degrees
+    import generate
+
+    first = generate.generate(tmp_path / "first", 2000, seed=3)
+    generate.generate(tmp_path / "second", 2000, seed=3)
+    for name in ("people.csv", "movies.csv", "stars.csv"):
+        assert (tmp_path / "first" / name).read_bytes() == (
+            tmp_path / "second" / name
+        ).read_bytes()
+
+    with open(tmp_path / "first" / "stars.csv", newline="") as f:
+        credits = list(csv.DictReader(f))
+    assert len(credits) == 2000
+    assert len({(row["person_id"], row["movie_id"]) for row in credits}) == 2000
+
+    degrees.load_data(str(tmp_path / "first"))
+    assert (degrees.graph.num_people(), degrees.graph.num_movies()) == first
+    assert len(degrees.graph.movie_people) == 2000
+
+
+def test_search_tree_paths_and_reset():
+    from util import SearchTree
+
+    tree = SearchTree(5)
+    tree.add(2)
+    tree.add(4, 2, 10)
+    tree.add(0, 4, 11)
+    tree.block(3)
+    assert 4 in tree and 3 in tree and 1 not in tree
+    assert len(tree) == 4
+    assert tree.path(0) == [(10, 4), (11, 0)]
+    assert tree.path(2) == []
+    tree.reset()
+    assert len(tree) == 0
+    assert not any(state in tree for state in range(5))
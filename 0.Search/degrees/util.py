@@ -1,4 +1,17 @@
+import heapq
+from array import array
+from collections import deque
+from itertools import count
+
+# Parent of a state in a SearchTree that has not been reached
+UNREACHED = -1
+# Parent of a state in a SearchTree that must never be reached
+BLOCKED = -2
+
+
 class Node():
+    __slots__ = ("state", "parent", "action")
+
     def __init__(self, state, parent, action):
         self.state = state
         self.parent = parent
@@ -7,13 +20,19 @@ class Node():
 
 class StackFrontier():
     def __init__(self):
-        self.frontier = []
+        self.frontier = deque()
+        # Number of nodes in the frontier for each state
+        self.states = {}
+
+    def __len__(self):
+        return len(self.frontier)
 
     def add(self, node):
         self.frontier.append(node)
+        self.states[node.state] = self.states.get(node.state, 0) + 1
 
     def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
+        return state in self.states
 
     def empty(self):
         return len(self.frontier) == 0
@@ -22,10 +41,17 @@ class StackFrontier():
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
+            node = self.frontier.pop()
+            self.discard(node.state)
             return node
 
+    def discard(self, state):
+        remaining = self.states[state] - 1
+        if remaining:
+            self.states[state] = remaining
+        else:
+            del self.states[state]
+
 
 class QueueFrontier(StackFrontier):
 
@@ -33,6 +59,80 @@ class QueueFrontier(StackFrontier):
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
+            node = self.frontier.popleft()
+            self.discard(node.state)
             return node
+
+
+class PriorityFrontier(StackFrontier):
+    """
+    Frontier that always removes the node with the lowest priority.
+
+    Nodes with equal priority come out in the order they were added.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.frontier = []
+        self.counter = count()
+
+    def add(self, node, priority=0):
+        heapq.heappush(self.frontier, (priority, next(self.counter), node))
+        self.states[node.state] = self.states.get(node.state, 0) + 1
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = heapq.heappop(self.frontier)[2]
+            self.discard(node.state)
+            return node
+
+
+class SearchTree():
+    """
+    Search tree over the integer states 0 to size - 1, stored as arrays
+    of the parent and action of every reached state instead of as Nodes.
+
+    The root is its own parent. Actions must be integers. reset() only
+    clears the states reached since the last reset, in `reached`, so one
+    tree can be reused by many searches.
+    """
+
+    def __init__(self, size):
+        self.parents = array("i", [UNREACHED]) * size
+        self.actions = array("i", bytes(4 * size))
+        self.reached = array("i")
+
+    def __len__(self):
+        return len(self.reached)
+
+    def __contains__(self, state):
+        return self.parents[state] != UNREACHED
+
+    def add(self, state, parent=None, action=0):
+        self.parents[state] = state if parent is None else parent
+        self.actions[state] = action
+        self.reached.append(state)
+
+    def block(self, state):
+        self.parents[state] = BLOCKED
+        self.reached.append(state)
+
+    def path(self, state):
+        """
+        Returns the (action, state) pairs leading from the root to `state`.
+        """
+        parents = self.parents
+        path = []
+        while parents[state] != state:
+            path.append((self.actions[state], state))
+            state = parents[state]
+        path.reverse()
+        return path
+
+    def reset(self):
+        parents = self.parents
+        for state in self.reached:
+            parents[state] = UNREACHED
+        del self.reached[:]
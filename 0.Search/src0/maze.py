@@ -1,93 +1,267 @@
+import heapq
+import os
+import random
 import sys
+from array import array
+from collections import OrderedDict, deque
+from itertools import count
 
+# Search strategies accepted by Maze.solve
+STRATEGIES = ("dfs", "bfs", "greedy", "astar", "jps")
 
-class Node:
-    def __init__(self, state, parent, action):
-        self.state = state
-        self.parent = parent
-        self.action = action
+# Number of goals whose distance fields are kept for solve_many, and the
+# most bytes they may take together; the latest field is always kept
+DISTANCE_FIELDS = 16
+DISTANCE_FIELD_BYTES = 1 << 26
 
+# Maze generation methods accepted by Maze.generate
+GENERATORS = ("backtracker", "kruskal")
 
-class StackFrontier:
-    def __init__(self):
-        self.frontier = []
+# Actions, numbered from 1 in the came-from grid of a search
+ACTIONS = ("up", "down", "left", "right")
 
-    def add(self, node):
-        self.frontier.append(node)
+# Came-from value of the start, which has no action
+START = len(ACTIONS) + 1
 
-    def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
+# Palette indexes of the colors of an image of the maze
+BORDER, WALL, START_COLOR, GOAL, SOLUTION, EXPLORED, EMPTY = range(7)
+PALETTE = [
+    *(0, 0, 0),
+    *(40, 40, 40),
+    *(255, 0, 0),
+    *(0, 171, 28),
+    *(220, 235, 113),
+    *(212, 97, 85),
+    *(237, 240, 252),
+]
 
-    def empty(self):
-        return len(self.frontier) == 0
+# Maps grid bytes, plus 2 for explored cells, to palette indexes
+CELL_COLORS = bytes([EMPTY, WALL, EXPLORED, WALL]) + bytes(252)
 
-    def remove(self):
-        if self.empty():
-            raise Exception("empty frontier")
-        else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
-            return node
-
-
-class QueueFrontier(StackFrontier):
-
-    def remove(self):
-        if self.empty():
-            raise Exception("empty frontier")
-        else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
-            return node
+# Maps every byte of an ASCII maze line to 1 for a wall or 0 for open
+WALL_BYTES = bytes(0 if byte in b" AB" else 1 for byte in range(256))
 
 
 class Maze:
 
     def __init__(self, filename):
 
-        # Read file and set height and width of maze
-        with open(filename) as f:
-            contents = f.read()
+        # Read the file one line at a time, first to find the height and
+        # width of the maze and validate the start and goal
+        height = 0
+        width = 0
+        starts = 0
+        goals = 0
+        with open(filename, "rb") as f:
+            for line in f:
+                line = line.rstrip(b"\r\n")
+                height += 1
+                length = len(line) if line.isascii() else len(line.decode())
+                width = max(width, length)
+                starts += line.count(b"A")
+                goals += line.count(b"B")
 
         # Validate start and goal
-        if contents.count("A") != 1:
+        if starts != 1:
             raise Exception("maze must have exactly one start point")
-        if contents.count("B") != 1:
+        if goals != 1:
             raise Exception("maze must have exactly one goal")
 
-        # Determine height and width of maze
-        contents = contents.splitlines()
-        self.height = len(contents)
-        self.width = max(len(line) for line in contents)
-
-        # Keep track of walls
-        self.walls = []
-        for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                try:
-                    if contents[i][j] == "A":
-                        self.start = (i, j)
-                        row.append(False)
-                    elif contents[i][j] == "B":
-                        self.goal = (i, j)
-                        row.append(False)
-                    elif contents[i][j] == " ":
-                        row.append(False)
-                    else:
-                        row.append(True)
-                except IndexError:
-                    row.append(False)
-            self.walls.append(row)
+        # Then to write each line straight into the wall grid
+        self.allocate(height, width, wall=False)
+        with open(filename, "rb") as f:
+            for i, line in enumerate(f):
+                line = line.rstrip(b"\r\n")
+                if line.isascii():
+                    row = line.translate(WALL_BYTES)
+                    start_col = line.find(b"A")
+                    goal_col = line.find(b"B")
+                else:
+                    text = line.decode()
+                    row = bytes(char not in " AB" for char in text)
+                    start_col = text.find("A")
+                    goal_col = text.find("B")
+                start = self.index((i, 0))
+                self.grid[start : start + len(row)] = row
+                if start_col != -1:
+                    self.start = (i, start_col)
+                if goal_col != -1:
+                    self.goal = (i, goal_col)
+
+    def allocate(self, height, width, wall):
+        """
+        Sets up an empty maze of the given size, all open or all walls.
+        """
+        self.height = height
+        self.width = width
+
+        # Keep track of walls, one byte per cell, row by row, inside a
+        # border of walls so that every open cell has four neighbors
+        self.stride = width + 2
+        self.grid = bytearray(b"\x01") * (self.stride * (height + 2))
+        if not wall:
+            for i in range(height):
+                start = self.index((i, 0))
+                self.grid[start : start + width] = bytes(width)
+
+        # (action number, index offset) of each move, in the order of ACTIONS
+        self.moves = ((1, -self.stride), (2, self.stride), (3, -1), (4, 1))
+        self.moves_by_offset = {offset: action for action, offset in self.moves}
 
         self.solution = None
+        self.explored_grid = None
+
+        # Built on first use by solve_many and walls, as the walls never change
+        self.labels = None
+        self.distance_fields = OrderedDict()
+        self.wall_rows = None
+
+    @classmethod
+    def generate(cls, height, width, seed=0, method="backtracker"):
+        """
+        Returns a random perfect maze, with exactly one path between any
+        two open cells, generated without any text.
+
+        Open rooms sit at even rows and columns and the cells between
+        two rooms are walls or passages. The start is the top left room
+        and the goal the bottom right one. `method` is one of GENERATORS:
+        a recursive backtracker, which makes long winding corridors, or
+        randomized Kruskal's algorithm, which makes many short dead ends.
+        The same arguments always give the same maze.
+        """
+        if method not in GENERATORS:
+            raise ValueError(f"unknown method {method!r}")
+        if height < 1 or width < 1:
+            raise ValueError(f"maze size must be at least 1x1, not {height}x{width}")
+        maze = cls.__new__(cls)
+        maze.allocate(height, width, wall=True)
+        rng = random.Random(seed)
+
+        # Rooms are numbered row by row
+        room_rows = (height + 1) // 2
+        room_cols = (width + 1) // 2
+        rooms = room_rows * room_cols
+        for room in range(rooms):
+            row, col = divmod(room, room_cols)
+            maze.grid[maze.index((2 * row, 2 * col))] = 0
+
+        if method == "backtracker":
+            maze.carve_backtracker(room_rows, room_cols, rng)
+        else:
+            maze.carve_kruskal(room_rows, room_cols, rng)
+
+        maze.start = (0, 0)
+        maze.goal = (2 * (room_rows - 1), 2 * (room_cols - 1))
+        return maze
+
+    def open_passage(self, room_cols, room, other):
+        """Removes the wall between two adjacent rooms."""
+        row = room // room_cols + other // room_cols
+        col = room % room_cols + other % room_cols
+        self.grid[self.index((row, col))] = 0
+
+    def carve_backtracker(self, room_rows, room_cols, rng):
+        """
+        Opens passages along a random depth-first walk over the rooms,
+        backing up whenever the walk reaches a dead end.
+        """
+        visited = bytearray(room_rows * room_cols)
+        visited[0] = 1
+        stack = [0]
+        while stack:
+            room = stack[-1]
+            row, col = divmod(room, room_cols)
+            options = []
+            if row > 0 and not visited[room - room_cols]:
+                options.append(room - room_cols)
+            if row < room_rows - 1 and not visited[room + room_cols]:
+                options.append(room + room_cols)
+            if col > 0 and not visited[room - 1]:
+                options.append(room - 1)
+            if col < room_cols - 1 and not visited[room + 1]:
+                options.append(room + 1)
+            if not options:
+                stack.pop()
+                continue
+            other = rng.choice(options)
+            visited[other] = 1
+            self.open_passage(room_cols, room, other)
+            stack.append(other)
+
+    def carve_kruskal(self, room_rows, room_cols, rng):
+        """
+        Opens the walls between adjacent rooms in random order,
+        skipping those between rooms that are already connected.
+        """
+        # Each wall is the lower numbered room times two, plus one if the
+        # other room is below rather than to the right
+        walls = array("q")
+        for room in range(room_rows * room_cols):
+            row, col = divmod(room, room_cols)
+            if col < room_cols - 1:
+                walls.append(2 * room)
+            if row < room_rows - 1:
+                walls.append(2 * room + 1)
+        rng.shuffle(walls)
+
+        # Union-find forest of connected rooms, with path halving
+        parents = array("i", range(room_rows * room_cols))
+
+        def find(room):
+            while parents[room] != room:
+                parents[room] = parents[parents[room]]
+                room = parents[room]
+            return room
+
+        for wall in walls:
+            room = wall >> 1
+            other = room + room_cols if wall & 1 else room + 1
+            root = find(room)
+            other_root = find(other)
+            if root != other_root:
+                parents[root] = other_root
+                self.open_passage(room_cols, room, other)
+
+    def index(self, cell):
+        """Returns the grid index of a (row, col) cell."""
+        return (cell[0] + 1) * self.stride + cell[1] + 1
+
+    def cell(self, index):
+        """Returns the (row, col) cell at a grid index."""
+        row, col = divmod(index, self.stride)
+        return (row - 1, col - 1)
+
+    @property
+    def walls(self):
+        """
+        Rows of booleans, True for walls, built once as the walls never
+        change. Read `grid` at `index(cell)` for single cells.
+        """
+        if self.wall_rows is None:
+            self.wall_rows = [
+                [bool(self.grid[self.index((i, j))]) for j in range(self.width)]
+                for i in range(self.height)
+            ]
+        return self.wall_rows
+
+    @property
+    def explored(self):
+        """Cells explored by the last call to solve, as a set of (row, col)."""
+        if self.explored_grid is None:
+            return set()
+        return {
+            self.cell(index)
+            for index, explored in enumerate(self.explored_grid)
+            if explored
+        }
 
     def print(self):
-        solution = self.solution[1] if self.solution is not None else None
+        solution = set(self.solution[1]) if self.solution is not None else None
         print()
-        for i, row in enumerate(self.walls):
-            for j, col in enumerate(row):
-                if col:
+        for i in range(self.height):
+            row = self.index((i, 0))
+            for j in range(self.width):
+                if self.grid[row + j]:
                     print("█", end="")
                 elif (i, j) == self.start:
                     print("A", end="")
@@ -101,133 +275,542 @@ class Maze:
         print()
 
     def neighbors(self, state):
-        row, col = state
-        candidates = [
-            ("up", (row - 1, col)),
-            ("down", (row + 1, col)),
-            ("left", (row, col - 1)),
-            ("right", (row, col + 1)),
-        ]
-
+        index = self.index(state)
         result = []
-        for action, (r, c) in candidates:
-            if 0 <= r < self.height and 0 <= c < self.width and not self.walls[r][c]:
-                result.append((action, (r, c)))
+        for action, offset in self.moves:
+            if not self.grid[index + offset]:
+                result.append((ACTIONS[action - 1], self.cell(index + offset)))
         return result
 
-    def solve(self):
-        """Finds a solution to maze, if one exists."""
+    def solve(self, strategy="dfs"):
+        """
+        Finds a solution to maze, if one exists.
+
+        `strategy` is one of STRATEGIES: depth-first search, breadth-first
+        search, greedy best-first search, A* search or A* over jump points
+        (Jump Point Search). The last three use the Manhattan distance to
+        the goal as their heuristic, and BFS, A* and JPS find a shortest
+        solution.
+
+        States are grid indexes. Instead of nodes, the search keeps one
+        byte per cell recording the action that reached it, from which
+        the solution is walked back.
+        """
+        if strategy not in STRATEGIES:
+            raise ValueError(f"unknown strategy {strategy!r}")
 
         # Keep track of number of states explored
         self.num_explored = 0
+        self.explored_grid = bytearray(len(self.grid))
+        came_from = bytearray(len(self.grid))
+        start = self.index(self.start)
+        goal = self.index(self.goal)
+
+        if strategy in ("dfs", "bfs"):
+            found = self.search_uninformed(strategy, start, goal, came_from)
+        elif strategy == "jps":
+            found = self.search_jump_points(start, goal, came_from)
+        else:
+            found = self.search_informed(strategy, start, goal, came_from)
+        if not found:
+            raise Exception("no solution")
+
+        # Walk back from the goal along the recorded actions
+        offsets = {action: offset for action, offset in self.moves}
+        actions = []
+        cells = []
+        index = goal
+        while came_from[index] != START:
+            action = came_from[index]
+            actions.append(ACTIONS[action - 1])
+            cells.append(self.cell(index))
+            index -= offsets[action]
+        actions.reverse()
+        cells.reverse()
+        self.solution = (actions, cells)
+
+    def search_uninformed(self, strategy, start, goal, came_from):
+        """
+        Searches depth-first or breadth-first from start, returning
+        whether the goal was reached.
+
+        Cells are marked in `came_from` as they are added to the frontier.
+        """
+        grid = self.grid
+        explored = self.explored_grid
+        moves = self.moves
 
         # Initialize frontier to just the starting position
-        start = Node(state=self.start, parent=None, action=None)
-        frontier = StackFrontier()
-        frontier.add(start)
+        frontier = deque([start])
+        remove = frontier.pop if strategy == "dfs" else frontier.popleft
+        came_from[start] = START
 
-        # Initialize an empty explored set
-        self.explored = set()
+        while frontier:
 
-        # Keep looping until solution found
-        while True:
-
-            # If nothing left in frontier, then no path
-            if frontier.empty():
-                raise Exception("no solution")
-
-            # Choose a node from the frontier
-            node = frontier.remove()
+            # Choose a state from the frontier
+            index = remove()
             self.num_explored += 1
 
-            # If node is the goal, then we have a solution
-            if node.state == self.goal:
-                actions = []
-                cells = []
-                while node.parent is not None:
-                    actions.append(node.action)
-                    cells.append(node.state)
-                    node = node.parent
-                actions.reverse()
-                cells.reverse()
-                self.solution = (actions, cells)
-                return
-
-            # Mark node as explored
-            self.explored.add(node.state)
-
-            # Add neighbors to frontier
-            for action, state in self.neighbors(node.state):
-                if not frontier.contains_state(state) and state not in self.explored:
-                    child = Node(state=state, parent=node, action=action)
-                    frontier.add(child)
-
-    def output_image(self, filename, show_solution=True, show_explored=False):
-        from PIL import Image, ImageDraw
+            # If state is the goal, then we have a solution
+            if index == goal:
+                return True
 
-        cell_size = 50
-        cell_border = 2
+            # Mark state as explored
+            explored[index] = 1
 
-        # Create a blank canvas
-        img = Image.new(
-            "RGBA", (self.width * cell_size, self.height * cell_size), "black"
-        )
-        draw = ImageDraw.Draw(img)
-
-        solution = self.solution[1] if self.solution is not None else None
-        for i, row in enumerate(self.walls):
-            for j, col in enumerate(row):
-
-                # Walls
-                if col:
-                    fill = (40, 40, 40)
-
-                # Start
-                elif (i, j) == self.start:
-                    fill = (255, 0, 0)
+            # Add neighbors to frontier
+            for action, offset in moves:
+                neighbor = index + offset
+                if not grid[neighbor] and not came_from[neighbor]:
+                    came_from[neighbor] = action
+                    frontier.append(neighbor)
+        return False
+
+    def search_informed(self, strategy, start, goal, came_from):
+        """
+        Searches greedy best-first or A* from start, returning whether
+        the goal was reached.
+
+        The frontier is a heap that may hold a cell more than once. A cell
+        is marked in `came_from` when it is first removed, which with the
+        consistent Manhattan heuristic is along a shortest path for A*.
+        Among equal estimates, cells closer to the goal come out first.
+        """
+        grid = self.grid
+        explored = self.explored_grid
+        moves = self.moves
+        stride = self.stride
+        goal_row, goal_col = divmod(goal, stride)
+        astar = strategy == "astar"
+
+        # Heap entries are (estimate, distance, order, index, action, cost)
+        counter = count()
+        distance = abs(start // stride - goal_row) + abs(start % stride - goal_col)
+        frontier = [(distance, distance, next(counter), start, START, 0)]
+
+        while frontier:
+
+            # Choose a state from the frontier, skipping stale entries
+            _, _, _, index, action, cost = heapq.heappop(frontier)
+            if explored[index] or came_from[index]:
+                continue
+            came_from[index] = action
+            self.num_explored += 1
 
-                # Goal
-                elif (i, j) == self.goal:
-                    fill = (0, 171, 28)
+            # If state is the goal, then we have a solution
+            if index == goal:
+                return True
 
-                # Solution
-                elif solution is not None and show_solution and (i, j) in solution:
-                    fill = (220, 235, 113)
+            # Mark state as explored
+            explored[index] = 1
 
-                # Explored
-                elif solution is not None and show_explored and (i, j) in self.explored:
-                    fill = (212, 97, 85)
+            # Add neighbors to frontier
+            cost += 1
+            for action, offset in moves:
+                neighbor = index + offset
+                if grid[neighbor] or explored[neighbor]:
+                    continue
+                row, col = divmod(neighbor, stride)
+                distance = abs(row - goal_row) + abs(col - goal_col)
+                estimate = cost + distance if astar else distance
+                heapq.heappush(
+                    frontier,
+                    (estimate, distance, next(counter), neighbor, action, cost),
+                )
+        return False
+
+    def search_jump_points(self, start, goal, came_from):
+        """
+        Searches A* over jump points from start, returning whether the
+        goal was reached. Only the cells of the solution are marked in
+        `came_from`.
+
+        Among the shortest paths of a uniform four-connected grid, only
+        those that turn from vertical to horizontal where a wall beside
+        the previous cell forces it are followed; turns from horizontal
+        to vertical are free. Moving vertically, a scan stops only at
+        such forced turns or the goal. Moving horizontally, it stops where
+        a vertical scan up or down would stop. Only those jump points
+        enter the heap.
+        """
+        grid = self.grid
+        stride = self.stride
+        goal_row, goal_col = divmod(goal, stride)
+
+        # Each column of the grid as bytes, for scanning it with find
+        columns = [bytes(grid[col::stride]) for col in range(stride)]
+
+        def distance(index):
+            row, col = divmod(index, stride)
+            return abs(row - goal_row) + abs(col - goal_col)
+
+        costs = {start: 0}
+        parents = {start: None}
+        counter = count()
+        frontier = [(distance(start), distance(start), next(counter), start, START)]
+        while frontier:
+
+            # Choose a jump point from the frontier, skipping stale entries
+            _, _, _, index, action = heapq.heappop(frontier)
+            if self.explored_grid[index]:
+                continue
+            self.num_explored += 1
 
-                # Empty cell
+            # If it is the goal, mark the cells of the solution
+            if index == goal:
+                came_from[start] = START
+                while parents[index] is not None:
+                    parent = parents[index]
+                    step = 1 if abs(index - parent) < stride else stride
+                    if index < parent:
+                        step = -step
+                    action = self.moves_by_offset[step]
+                    for cell in range(index, parent, -step):
+                        came_from[cell] = action
+                    index = parent
+                return True
+
+            # Mark it as explored
+            self.explored_grid[index] = 1
+
+            # Jump in the directions a canonical path can continue in
+            row, col = divmod(index, stride)
+            for direction in self.jump_directions(index, action):
+                if direction <= 2:
+                    jump_row = self.jump_vertical(
+                        columns, row, col, direction == 2, goal_row, goal_col
+                    )
+                    if jump_row is None:
+                        continue
+                    jump = jump_row * stride + col
+                    length = abs(jump_row - row)
                 else:
-                    fill = (237, 240, 252)
-
-                # Draw cell
-                draw.rectangle(
-                    (
-                        [
-                            (j * cell_size + cell_border, i * cell_size + cell_border),
-                            (
-                                (j + 1) * cell_size - cell_border,
-                                (i + 1) * cell_size - cell_border,
-                            ),
-                        ]
-                    ),
-                    fill=fill,
+                    jump_col = self.jump_horizontal(
+                        columns, row, col, 1 if direction == 4 else -1, goal
+                    )
+                    if jump_col is None:
+                        continue
+                    jump = row * stride + jump_col
+                    length = abs(jump_col - col)
+                cost = costs[index] + length
+                if self.explored_grid[jump] or cost >= costs.get(jump, cost + 1):
+                    continue
+                costs[jump] = cost
+                parents[jump] = index
+                estimate = distance(jump)
+                heapq.heappush(
+                    frontier,
+                    (cost + estimate, estimate, next(counter), jump, direction),
                 )
-
-        img.save(filename)
-
-
-if len(sys.argv) != 2:
-    sys.exit("Usage: python maze.py maze.txt")
-
-m = Maze(sys.argv[1])
-print("Maze:")
-m.print()
-print("Solving...")
-m.solve()
-print("States Explored:", m.num_explored)
-print("Solution:")
-m.print()
-m.output_image("maze.png", show_explored=True)
+        return False
+
+    def jump_directions(self, index, action):
+        """
+        Returns the actions a canonical path can take from a jump point
+        reached by `action`.
+        """
+        if action == START:
+            return (1, 2, 3, 4)
+        if action >= 3:
+            # Moving horizontally, any turn is allowed
+            return (action, 1, 2)
+
+        # Moving vertically, turn only beside a wall next to the last cell
+        directions = [action]
+        behind = index + (self.stride if action == 1 else -self.stride)
+        for side, offset in ((3, -1), (4, 1)):
+            if not self.grid[index + offset] and self.grid[behind + offset]:
+                directions.append(side)
+        return directions
+
+    def jump_vertical(self, columns, row, col, down, goal_row, goal_col):
+        """
+        Returns the row of the first jump point moving up or down from
+        (row, col) in grid coordinates, or None if a wall comes first.
+
+        The column and its two neighbors are searched with bytes.find
+        for the next wall and the next wall-to-opening step beside it.
+        """
+        column = columns[col]
+        if down:
+            stop = wall = column.find(1, row + 1)
+            for side in (columns[col - 1], columns[col + 1]):
+                turn = side.find(b"\x01\x00", row, wall)
+                if turn != -1 and turn + 1 < stop:
+                    stop = turn + 1
+            if col == goal_col and row < goal_row < stop:
+                stop = goal_row
+        else:
+            stop = wall = column.rfind(1, 0, row)
+            for side in (columns[col - 1], columns[col + 1]):
+                turn = side.rfind(b"\x00\x01", wall + 1, row + 1)
+                if turn > stop:
+                    stop = turn
+            if col == goal_col and stop < goal_row < row:
+                stop = goal_row
+        return None if stop == wall else stop
+
+    def jump_horizontal(self, columns, row, col, step, goal):
+        """
+        Returns the column of the first jump point moving left or right
+        from (row, col) in grid coordinates, or None if a wall comes first.
+        """
+        grid = self.grid
+        stride = self.stride
+        goal_row, goal_col = divmod(goal, stride)
+        index = row * stride + col
+        while True:
+            index += step
+            col += step
+            if grid[index]:
+                return None
+            if index == goal:
+                return col
+            for down in (True, False):
+                if (
+                    self.jump_vertical(columns, row, col, down, goal_row, goal_col)
+                    is not None
+                ):
+                    return col
+
+    def component_labels(self):
+        """
+        Returns an array giving every grid index the number of its
+        connected component of open cells, starting at 1, or 0 for walls.
+        """
+        if self.labels is not None:
+            return self.labels
+        grid = self.grid
+        offsets = [offset for _, offset in self.moves]
+        labels = array("i", bytes(4 * len(grid)))
+        label = 0
+        index = grid.find(0)
+        while index != -1:
+            if not labels[index]:
+                # Flood fill the component of this cell
+                label += 1
+                labels[index] = label
+                stack = [index]
+                while stack:
+                    cell = stack.pop()
+                    for offset in offsets:
+                        neighbor = cell + offset
+                        if not grid[neighbor] and not labels[neighbor]:
+                            labels[neighbor] = label
+                            stack.append(neighbor)
+            index = grid.find(0, index + 1)
+        self.labels = labels
+        return labels
+
+    def distance_field(self, goal):
+        """
+        Returns an array of the number of steps from every grid index to
+        the (row, col) goal, or -1 where the goal cannot be reached.
+
+        The fields of the last DISTANCE_FIELDS goals are kept, as long as
+        they fit in DISTANCE_FIELD_BYTES. Distances are shorter than the
+        grid, so grids of up to 2 ** 15 indexes use 2 bytes per index.
+        """
+        index = self.index(goal)
+        field = self.distance_fields.get(index)
+        if field is not None:
+            self.distance_fields.move_to_end(index)
+            return field
+
+        # Breadth-first search from the goal, one layer at a time
+        grid = self.grid
+        offsets = [offset for _, offset in self.moves]
+        field = array("h" if len(grid) <= 1 << 15 else "i", [-1]) * len(grid)
+        field[index] = 0
+        layer = [index]
+        distance = 0
+        while layer:
+            distance += 1
+            next_layer = []
+            for cell in layer:
+                for offset in offsets:
+                    neighbor = cell + offset
+                    if field[neighbor] < 0 and not grid[neighbor]:
+                        field[neighbor] = distance
+                        next_layer.append(neighbor)
+            layer = next_layer
+
+        self.distance_fields[index] = field
+        field_bytes = field.itemsize * len(field)
+        keep = max(1, min(DISTANCE_FIELDS, DISTANCE_FIELD_BYTES // field_bytes))
+        while len(self.distance_fields) > keep:
+            self.distance_fields.popitem(last=False)
+        return field
+
+    def solve_many(self, pairs):
+        """
+        Returns a shortest solution (actions, cells), as in `solution`,
+        for each (start, goal) pair of (row, col) cells, or None for
+        pairs that are not connected.
+
+        Pairs in different components, or on walls, are answered from the
+        component labels without searching. The others are grouped by goal,
+        so that the starts of each goal share its distance field.
+        """
+        labels = self.component_labels()
+        results = [None] * len(pairs)
+        by_goal = {}
+        for position, (start, goal) in enumerate(pairs):
+            for row, col in (start, goal):
+                if not (0 <= row < self.height and 0 <= col < self.width):
+                    raise ValueError(f"cell {(row, col)} is outside the maze")
+            label = labels[self.index(start)]
+            if label and label == labels[self.index(goal)]:
+                by_goal.setdefault(goal, []).append(position)
+
+        for goal, positions in by_goal.items():
+            field = self.distance_field(goal)
+            for position in positions:
+                results[position] = self.descend(field, pairs[position][0])
+        return results
+
+    def descend(self, field, start):
+        """
+        Returns the (actions, cells) solution from a (row, col) start,
+        stepping to a neighbor one step closer to the goal each time.
+        """
+        actions = []
+        cells = []
+        index = self.index(start)
+        distance = field[index]
+        while distance:
+            distance -= 1
+            for action, offset in self.moves:
+                if field[index + offset] == distance:
+                    index += offset
+                    break
+            actions.append(ACTIONS[action - 1])
+            cells.append(self.cell(index))
+        return (actions, cells)
+
+    def output_image(
+        self,
+        filename,
+        show_solution=True,
+        show_explored=False,
+        cell_size=50,
+        cell_border=2,
+        tile_size=None,
+    ):
+        """
+        Draws the maze into a PNG file, `cell_size` pixels per cell with
+        a gap of `cell_border` pixels around each cell.
+
+        With `tile_size`, the maze is cut into tiles of up to that many
+        cells per side, saved as separate files with the tile's row and
+        column appended to the name. Returns the names of the files saved.
+        The gaps must leave some of each cell, so `cell_size` has to be
+        more than twice `cell_border`.
+        """
+        if cell_border < 0 or cell_size <= 2 * cell_border:
+            raise ValueError(
+                f"cell_size {cell_size} leaves no room inside a border of "
+                f"{cell_border}"
+            )
+        from PIL import Image
+
+        # One palette index per cell, then each tile scaled up at once
+        cells = Image.frombytes(
+            "P",
+            (self.width, self.height),
+            bytes(self.cell_colors(show_solution, show_explored)),
+        )
+        cells.putpalette(PALETTE)
+        if tile_size is None:
+            tile_size = max(self.height, self.width)
+
+        root, extension = os.path.splitext(filename)
+        filenames = []
+        for top in range(0, self.height, tile_size):
+            for left in range(0, self.width, tile_size):
+                box = (
+                    left,
+                    top,
+                    min(left + tile_size, self.width),
+                    min(top + tile_size, self.height),
+                )
+                tile = cells.crop(box)
+                image = tile.resize(
+                    (tile.width * cell_size, tile.height * cell_size),
+                    Image.NEAREST,
+                )
+                if cell_border:
+                    mask = border_mask(tile.width, tile.height, cell_size, cell_border)
+                    image.paste(BORDER, mask=mask)
+                if tile.size == cells.size:
+                    name = filename
+                else:
+                    name = f"{root}_{top // tile_size}_{left // tile_size}{extension}"
+                image.save(name)
+                filenames.append(name)
+        return filenames
+
+    def cell_colors(self, show_solution, show_explored):
+        """
+        Returns a bytearray of the palette index of each cell, row by row.
+        """
+        grid = self.grid
+        if self.solution is not None and show_explored and self.explored_grid:
+            # Explored flags shifted up one bit, so that no byte carries
+            # into the next, mark explored open cells with 2
+            grid = (
+                int.from_bytes(grid, "big")
+                | int.from_bytes(self.explored_grid, "big") << 1
+            ).to_bytes(len(grid), "big")
+        colors = bytes(grid).translate(CELL_COLORS)
+
+        # Drop the border of walls
+        cells = bytearray()
+        for i in range(self.height):
+            start = self.index((i, 0))
+            cells += colors[start : start + self.width]
+
+        if self.solution is not None and show_solution:
+            for i, j in self.solution[1]:
+                cells[i * self.width + j] = SOLUTION
+        cells[self.start[0] * self.width + self.start[1]] = START_COLOR
+        cells[self.goal[0] * self.width + self.goal[1]] = GOAL
+        return cells
+
+
+def border_mask(width, height, cell_size, cell_border):
+    """
+    Returns an image that is white on the gaps between the cells of a
+    width x height maze drawn with the given sizes.
+    """
+    from PIL import Image
+
+    # Each cell is inside [cell_border, cell_size - cell_border], inclusive
+    inside = max(0, min(cell_size - cell_border, cell_size - 1) - cell_border + 1)
+    after = cell_size - cell_border - inside
+    gap_row = b"\xff" * (width * cell_size)
+    cell_row = (b"\xff" * cell_border + bytes(inside) + b"\xff" * after) * width
+    strip = gap_row * cell_border + cell_row * inside + gap_row * after
+    return Image.frombytes("L", (width * cell_size, height * cell_size), strip * height)
+
+
+def main():
+    if len(sys.argv) not in (2, 3):
+        sys.exit(f"Usage: python maze.py maze.txt [{'|'.join(STRATEGIES)}]")
+    strategy = sys.argv[2] if len(sys.argv) == 3 else "dfs"
+    if strategy not in STRATEGIES:
+        sys.exit(f"Unknown strategy {strategy}, use one of {', '.join(STRATEGIES)}")
+
+    m = Maze(sys.argv[1])
+    print("Maze:")
+    m.print()
+    print("Solving...")
+    m.solve(strategy)
+    print("States Explored:", m.num_explored)
+    print("Solution:")
+    m.print()
+    m.output_image("maze.png", show_explored=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+import os
+import random
+
+import pytest
+
+import maze as maze_module
+from maze import STRATEGIES, Maze
+
+HERE = os.path.dirname(__file__)
+
+
+def write_maze(tmp_path, rows):
+    path = tmp_path / "maze.txt"
+    path.write_text("\n".join(rows) + "\n")
+    return str(path)
+
+
+def random_maze(tmp_path, seed, height=15, width=20, density=0.3):
+    """
+    Writes a random maze with its start and goal in opposite corners.
+    """
+    rng = random.Random(seed)
+    rows = [
+        "".join("#" if rng.random() < density else " " for _ in range(width))
+        for _ in range(height)
+    ]
+    rows[0] = "A" + rows[0][1:]
+    rows[-1] = rows[-1][:-1] + "B"
+    return write_maze(tmp_path, rows)
+
+
+def assert_valid_solution(maze):
+    actions, cells = maze.solution
+    assert len(actions) == len(cells)
+    state = maze.start
+    for action, cell in zip(actions, cells):
+        assert (action, cell) in maze.neighbors(state)
+        state = cell
+    assert state == maze.goal
+
+
+@pytest.mark.parametrize("name", ["maze1.txt", "maze2.txt", "maze3.txt"])
+def test_strategies_solve_examples(name):
+    lengths = {}
+    for strategy in STRATEGIES:
+        maze = Maze(os.path.join(HERE, name))
+        maze.solve(strategy)
+        assert_valid_solution(maze)
+        assert maze.num_explored == len(maze.explored) + 1
+        lengths[strategy] = len(maze.solution[1])
+    assert lengths["astar"] == lengths["jps"] == lengths["bfs"]
+    assert min(lengths.values()) == lengths["bfs"]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_astar_matches_bfs_on_random_mazes(tmp_path, seed):
+    filename = random_maze(tmp_path, seed)
+    bfs = Maze(filename)
+    try:
+        bfs.solve("bfs")
+    except Exception:
+        for strategy in STRATEGIES:
+            with pytest.raises(Exception, match="no solution"):
+                Maze(filename).solve(strategy)
+        return
+
+    astar = Maze(filename)
+    astar.solve("astar")
+    assert_valid_solution(astar)
+    assert len(astar.solution[1]) == len(bfs.solution[1])
+    assert astar.num_explored <= bfs.num_explored
+
+    greedy = Maze(filename)
+    greedy.solve("greedy")
+    assert_valid_solution(greedy)
+
+
+@pytest.mark.parametrize("density", [0.0, 0.1, 0.25, 0.4])
+def test_jump_point_search_matches_bfs(tmp_path, density):
+    rng = random.Random(density)
+    for _ in range(100):
+        height = rng.randint(1, 12)
+        width = rng.randint(2, 12)
+        cells = [
+            ["#" if rng.random() < density else " " for _ in range(width)]
+            for _ in range(height)
+        ]
+        start, goal = rng.sample(
+            [(i, j) for i in range(height) for j in range(width)], 2
+        )
+        cells[start[0]][start[1]] = "A"
+        cells[goal[0]][goal[1]] = "B"
+        filename = write_maze(tmp_path, ["".join(row) for row in cells])
+
+        bfs = Maze(filename)
+        jps = Maze(filename)
+        try:
+            bfs.solve("bfs")
+        except Exception:
+            with pytest.raises(Exception, match="no solution"):
+                jps.solve("jps")
+            continue
+        jps.solve("jps")
+        assert_valid_solution(jps)
+        assert len(jps.solution[1]) == len(bfs.solution[1])
+
+
+def test_astar_goes_straight_across_open_grid(tmp_path):
+    rows = [" " * 40 for _ in range(40)]
+    rows[0] = "A" + rows[0][1:]
+    rows[-1] = rows[-1][:-1] + "B"
+    maze = Maze(write_maze(tmp_path, rows))
+    maze.solve("astar")
+    assert len(maze.solution[1]) == 78
+    assert maze.num_explored == 79
+
+    # Jump Point Search only stops at the start, one turn and the goal
+    maze.solve("jps")
+    assert len(maze.solution[1]) == 78
+    assert maze.num_explored == 3
+
+
+def test_unknown_strategy(tmp_path):
+    maze = Maze(write_maze(tmp_path, ["A B"]))
+    with pytest.raises(ValueError):
+        maze.solve("dijkstra")
+
+
+def test_grid_layout_and_ragged_rows(tmp_path):
+    maze = Maze(write_maze(tmp_path, ["A #", "#", "  B"]))
+    assert (maze.height, maze.width) == (3, 3)
+    # Short rows are open past their end, as in the text
+    assert maze.walls == [
+        [False, False, True],
+        [True, False, False],
+        [False, False, False],
+    ]
+    assert maze.walls is maze.walls
+    assert maze.cell(maze.index((2, 1))) == (2, 1)
+    assert sorted(maze.neighbors((1, 1))) == [
+        ("down", (2, 1)),
+        ("right", (1, 2)),
+        ("up", (0, 1)),
+    ]
+    maze.solve("bfs")
+    assert maze.solution == (
+        ["right", "down", "down", "right"],
+        [(0, 1), (1, 1), (2, 1), (2, 2)],
+    )
+
+
+def test_loader_handles_line_endings_and_unicode(tmp_path):
+    path = tmp_path / "maze.txt"
+    path.write_bytes("██A █\r\n█\r\n  B██\r\n".encode())
+    maze = Maze(str(path))
+    assert (maze.height, maze.width, maze.start, maze.goal) == (3, 5, (0, 2), (2, 2))
+    assert maze.walls == [
+        [True, True, False, False, True],
+        [True, False, False, False, False],
+        [False, False, False, True, True],
+    ]
+
+    with pytest.raises(Exception, match="exactly one goal"):
+        Maze(write_maze(tmp_path, ["A  ", "B B"]))
+
+
+@pytest.mark.parametrize("method", ["backtracker", "kruskal"])
+def test_generate_perfect_mazes(method):
+    maze = Maze.generate(21, 31, seed=4, method=method)
+    assert maze.grid == Maze.generate(21, 31, seed=4, method=method).grid
+    assert maze.grid != Maze.generate(21, 31, seed=5, method=method).grid
+
+    # Every room is reachable, through exactly one passage fewer than rooms
+    rooms = 11 * 16
+    open_cells = [
+        (i, j)
+        for i in range(21)
+        for j in range(31)
+        if not maze.grid[maze.index((i, j))]
+    ]
+    assert len(open_cells) == 2 * rooms - 1
+    reached = {maze.start}
+    stack = [maze.start]
+    while stack:
+        for _, cell in maze.neighbors(stack.pop()):
+            if cell not in reached:
+                reached.add(cell)
+                stack.append(cell)
+    assert len(reached) == len(open_cells)
+    maze.solve("bfs")
+    assert_valid_solution(maze)
+
+
+@pytest.mark.parametrize("size", [(0, 5), (5, 0), (-1, 3)])
+def test_generate_rejects_empty_sizes(size):
+    with pytest.raises(ValueError):
+        Maze.generate(*size)
+    # A single room is its own start and goal
+    assert Maze.generate(1, 1).goal == (0, 0)
+
+
+def test_output_image_colors_and_tiles(tmp_path):
+    Image = pytest.importorskip("PIL.Image")
+
+    maze = Maze(write_maze(tmp_path, ["A  #", "## #", "B   "]))
+    maze.solve("bfs")
+    filename = str(tmp_path / "maze.png")
+    assert maze.output_image(filename, cell_size=3, cell_border=0) == [filename]
+    image = Image.open(filename).convert("RGB")
+    assert image.size == (12, 9)
+    assert image.getpixel((1, 1)) == (255, 0, 0)
+    assert image.getpixel((10, 1)) == (40, 40, 40)
+    assert image.getpixel((1, 7)) == (0, 171, 28)
+    assert image.getpixel((4, 1)) == (220, 235, 113)
+
+    names = maze.output_image(filename, cell_size=4, cell_border=1, tile_size=3)
+    assert [os.path.basename(name) for name in names] == [
+        "maze_0_0.png",
+        "maze_0_1.png",
+    ]
+    first, second = (Image.open(name).convert("RGB") for name in names)
+    assert (first.size, second.size) == ((12, 12), (4, 12))
+    # Gaps between cells are black, inside the top left cell is the start
+    assert first.getpixel((0, 0)) == (0, 0, 0)
+    assert first.getpixel((2, 2)) == (255, 0, 0)
+
+    for cell_size, cell_border in ((4, 2), (3, 2), (0, 0), (5, -1)):
+        with pytest.raises(ValueError, match="no room"):
+            maze.output_image(filename, cell_size=cell_size, cell_border=cell_border)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_solve_many_matches_bfs(tmp_path, seed):
+    maze = Maze(random_maze(tmp_path, seed, density=0.35))
+    rng = random.Random(seed)
+    cells = [(i, j) for i in range(maze.height) for j in range(maze.width)]
+    goals = rng.sample(cells, 3)
+    pairs = [(rng.choice(cells), rng.choice(goals)) for _ in range(60)]
+    results = maze.solve_many(pairs)
+    assert len(maze.distance_fields) <= len(goals)
+
+    for (start, goal), result in zip(pairs, results):
+        single = Maze(random_maze(tmp_path, seed, density=0.35))
+        single.start = start
+        single.goal = goal
+        if maze.grid[maze.index(start)] or maze.grid[maze.index(goal)]:
+            assert result is None
+            continue
+        try:
+            single.solve("bfs")
+        except Exception:
+            assert result is None
+            continue
+        assert result is not None
+        assert len(result[1]) == len(single.solution[1])
+        single.solution = result
+        assert_valid_solution(single)
+
+
+def test_solve_many_skips_search_across_components(tmp_path):
+    maze = Maze(write_maze(tmp_path, ["A #  ", "  # B"]))
+    labels = maze.component_labels()
+    assert labels[maze.index((0, 0))] != labels[maze.index((0, 4))]
+    assert maze.solve_many([((0, 0), (1, 4)), ((0, 0), (0, 2))]) == [None, None]
+    assert not maze.distance_fields
+    assert maze.solve_many([((0, 0), (1, 1)), ((0, 1), (1, 1))]) == [
+        (["down", "right"], [(1, 0), (1, 1)]),
+        (["down"], [(1, 1)]),
+    ]
+    assert len(maze.distance_fields) == 1
+    with pytest.raises(ValueError):
+        maze.solve_many([((0, 0), (5, 5))])
+
+
+def test_distance_fields_fit_their_byte_budget(monkeypatch):
+    maze = Maze.generate(41, 41, seed=1)
+    goals = [(0, 2 * col) for col in range(5)]
+    field = maze.distance_field(goals[0])
+    assert field.itemsize == 2
+    assert field[maze.index((40, 40))] > 0
+
+    # Room for two fields only, then for none but the latest
+    monkeypatch.setattr(maze_module, "DISTANCE_FIELD_BYTES", 2 * len(field) * 2)
+    for goal in goals:
+        maze.distance_field(goal)
+    assert list(maze.distance_fields) == [maze.index(goal) for goal in goals[-2:]]
+    monkeypatch.setattr(maze_module, "DISTANCE_FIELD_BYTES", 0)
+    maze.distance_field(goals[0])
+    assert list(maze.distance_fields) == [maze.index(goals[0])]
+
+    large = Maze.generate(199, 199)
+    assert large.distance_field(large.goal).itemsize == 4
@@ -0,0 +1,215 @@
+"""
+Tic Tac Toe Player on bitboards
+
+A position is a pair of 9-bit integers (x, o), with bit 3 * i + j set
+when player X or O holds cell (i, j). The functions taking a board are
+adapters with the same behavior as those in tictactoe.py, so either
+module can be imported as `ttt`.
+"""
+
+X = "X"
+O = "O"
+EMPTY = None
+
+# Every cell of the board
+FULL = 0b111111111
+
+# Cells of each row, column and diagonal
+WIN_MASKS = (
+    0b000000111,
+    0b000111000,
+    0b111000000,
+    0b001001001,
+    0b010010010,
+    0b100100100,
+    0b100010001,
+    0b001010100,
+)
+
+# 1 at every set of cells that contains a whole line, else 0
+WINNING = bytes(
+    any(cells & mask == mask for mask in WIN_MASKS) for cells in range(FULL + 1)
+)
+
+
+def encode(board):
+    """
+    Returns the (x, o) position of a board.
+    """
+    x = o = 0
+    bit = 1
+    for row in board:
+        for cell in row:
+            if cell == X:
+                x |= bit
+            elif cell == O:
+                o |= bit
+            bit <<= 1
+    return x, o
+
+
+def decode(x, o):
+    """
+    Returns the board of an (x, o) position.
+    """
+    return [
+        [
+            X if x >> (3 * i + j) & 1 else O if o >> (3 * i + j) & 1 else EMPTY
+            for j in range(3)
+        ]
+        for i in range(3)
+    ]
+
+
+def to_move(x, o):
+    """
+    Returns X or O, the player who has the next turn in a position.
+    """
+    return X if x.bit_count() == o.bit_count() else O
+
+
+def value(x, o):
+    """
+    Returns 1 if X wins a position with best play, -1 if O wins, 0 otherwise.
+    """
+    if WINNING[x]:
+        return 1
+    if WINNING[o]:
+        return -1
+    empty = FULL & ~(x | o)
+    if not empty:
+        return 0
+
+    if x.bit_count() == o.bit_count():
+        # X to move takes the highest value
+        best = -1
+        while empty:
+            move = empty & -empty
+            empty ^= move
+            score = value(x | move, o)
+            if score > best:
+                best = score
+        return best
+
+    # O to move takes the lowest value
+    best = 1
+    while empty:
+        move = empty & -empty
+        empty ^= move
+        score = value(x, o | move)
+        if score < best:
+            best = score
+    return best
+
+
+def best_move(x, o):
+    """
+    Returns the cell number of an optimal move for the player to move,
+    or None if the game is over.
+    """
+    if WINNING[x] or WINNING[o]:
+        return None
+    empty = FULL & ~(x | o)
+    maximize = x.bit_count() == o.bit_count()
+    best = None
+    best_score = None
+    while empty:
+        move = empty & -empty
+        empty ^= move
+        if maximize:
+            score = value(x | move, o)
+        else:
+            score = -value(x, o | move)
+        if best_score is None or score > best_score:
+            best = move.bit_length() - 1
+            best_score = score
+    return best
+
+
+def initial_state():
+    """
+    Returns starting state of the board.
+    """
+    return [[EMPTY, EMPTY, EMPTY], [EMPTY, EMPTY, EMPTY], [EMPTY, EMPTY, EMPTY]]
+
+
+def player(board):
+    """
+    Returns player who has the next turn on a board.
+    If there are no EMPTY cells, it returns None
+    """
+    x, o = encode(board)
+    if x | o == FULL:
+        return None
+    return to_move(x, o)
+
+
+def actions(board):
+    """
+    Returns set of all possible actions (i, j) available on the board.
+    """
+    x, o = encode(board)
+    empty = FULL & ~(x | o)
+    return {divmod(cell, 3) for cell in range(9) if empty >> cell & 1}
+
+
+def result(board, action):
+    """
+    Returns the board that results from making move (i, j) on the board.
+    """
+    i, j = action
+
+    if i < 0 or i > 2 or j < 0 or j > 2:
+        raise ValueError("Out-of-bounds move")
+
+    x, o = encode(board)
+    move = 1 << (3 * i + j)
+    if (x | o) & move:
+        raise ValueError("Invalid action: Cell is already occupied.")
+
+    if to_move(x, o) == X:
+        return decode(x | move, o)
+    return decode(x, o | move)
+
+
+def winner(board):
+    """
+    Returns the winner of the game, if there is one.
+    """
+    x, o = encode(board)
+    if WINNING[x]:
+        return X
+    if WINNING[o]:
+        return O
+    return None
+
+
+def terminal(board):
+    """
+    Returns True if game is over, False otherwise.
+    """
+    x, o = encode(board)
+    return bool(WINNING[x] or WINNING[o]) or x | o == FULL
+
+
+def utility(board):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    x, o = encode(board)
+    if WINNING[x]:
+        return 1
+    if WINNING[o]:
+        return -1
+    return 0
+
+
+def minimax(board):
+    """
+    Returns the optimal action for the current player on the board
+    using the minimax algorithm.
+    """
+    move = best_move(*encode(board))
+    if move is None:
+        return None
+    return divmod(move, 3)
@@ -11,6 +11,31 @@ E = EMPTY
 
 board = [[EMPTY, EMPTY, EMPTY], [EMPTY, EMPTY, EMPTY], [EMPTY, EMPTY, EMPTY]]
 
+# Values found by max_value and min_value, kept for the whole session.
+# Keys are (board_key(board), True for max_value or False for min_value)
+transposition_table = {}
+
+# Base-3 digit of each kind of cell in a board key
+CELL_DIGITS = {EMPTY: 0, X: 1, O: 2}
+
+
+def symmetries():
+    """
+    Returns the order in which to read the 9 cells of a board for each
+    of its 4 rotations, with and without a reflection.
+    """
+    orders = []
+    cells = [(i, j) for i in range(3) for j in range(3)]
+    for _ in range(2):
+        for _ in range(4):
+            orders.append(tuple(3 * i + j for i, j in cells))
+            cells = [(j, 2 - i) for i, j in cells]
+        cells = [(i, 2 - j) for i, j in cells]
+    return tuple(orders)
+
+
+SYMMETRIES = symmetries()
+
 
 def initial_state():
     """
@@ -141,23 +166,47 @@ def utility(board) -> int:
         return 0  # No winner, so utility is 0 (tie or ongoing game)
 
 
+def board_key(board) -> int:
+    """
+    Returns the same number for a board and all of its rotations and
+    reflections, which have the same minimax value.
+    """
+    digits = [CELL_DIGITS[cell] for row in board for cell in row]
+    key = None
+    for order in SYMMETRIES:
+        number = 0
+        for cell in order:
+            number = number * 3 + digits[cell]
+        if key is None or number < key:
+            key = number
+    return key
+
+
 def max_value(board) -> int:
+    key = (board_key(board), True)
+    if key in transposition_table:
+        return transposition_table[key]
     if terminal(board):
         return utility(board)
     v = -15
     for action in actions(board):
         res_board = result(board, action)
         v = max(v, min_value(res_board))
+    transposition_table[key] = v
     return v
 
 
 def min_value(board) -> int:
+    key = (board_key(board), False)
+    if key in transposition_table:
+        return transposition_table[key]
     if terminal(board):
         return utility(board)
     v = 15
     for action in actions(board):
         res_board = result(board, action)
         v = min(v, max_value(res_board))
+    transposition_table[key] = v
     return v
 
 
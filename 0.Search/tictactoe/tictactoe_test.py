@@ -195,3 +195,104 @@ def test_utility():
     # Test utility for non-terminal state
     not_terminal_board = [[X, O, EMPTY], [O, X, EMPTY], [EMPTY, EMPTY, EMPTY]]
     assert ttt.utility(not_terminal_board) == 0
+
+
+def reachable_boards():
+    """
+    Returns every board that can be reached in a game, including finished ones.
+    """
+    boards = {}
+    stack = [ttt.initial_state()]
+    while stack:
+        board = stack.pop()
+        key = str(board)
+        if key in boards:
+            continue
+        boards[key] = board
+        if not ttt.terminal(board):
+            for action in ttt.actions(board):
+                stack.append(ttt.result(board, action))
+    return list(boards.values())
+
+
+def test_bitboard_adapters_match():
+    """
+    Test that the bitboard engine agrees with tictactoe.py on every reachable board.
+    """
+    import bitboard
+
+    boards = reachable_boards()
+    assert len(boards) == 5478, "Test failed: wrong number of reachable boards."
+    for board in boards:
+        assert bitboard.decode(*bitboard.encode(board)) == board
+        for name in ("player", "actions", "winner", "terminal", "utility"):
+            assert getattr(bitboard, name)(board) == getattr(ttt, name)(board), (
+                f"Test failed: bitboard.{name} differs on {board}."
+            )
+        for action in ttt.actions(board):
+            assert bitboard.result(board, action) == ttt.result(board, action)
+
+
+def minimax_value(board):
+    """
+    Returns the value of a board with best play, using tictactoe.py.
+    """
+    if ttt.terminal(board):
+        return ttt.utility(board)
+    if ttt.player(board) == X:
+        return ttt.max_value(board)
+    return ttt.min_value(board)
+
+
+def test_bitboard_minimax():
+    """
+    Test that the bitboard minimax picks moves that keep the minimax value.
+    """
+    import bitboard
+
+    assert bitboard.value(0, 0) == 0, "Test failed: perfect play should tie."
+    assert bitboard.minimax([[X, X, X], [O, O, EMPTY], [EMPTY] * 3]) is None
+    for board in reachable_boards():
+        if ttt.terminal(board) or len(ttt.actions(board)) > 4:
+            continue
+        best = minimax_value(board)
+        assert bitboard.value(*bitboard.encode(board)) == best
+        after = ttt.result(board, bitboard.minimax(board))
+        assert (
+            minimax_value(after) == best
+        ), f"Test failed: bitboard.minimax made a worse move on {board}."
+
+
+def test_board_key_folds_symmetries():
+    """
+    Test that board_key is the same for all rotations and reflections of a board.
+    """
+    board = [[X, O, EMPTY], [EMPTY, X, EMPTY], [O, EMPTY, EMPTY]]
+    keys = set()
+    for _ in range(2):
+        for _ in range(4):
+            keys.add(ttt.board_key(board))
+            board = [list(row) for row in zip(*board[::-1])]
+        board = [row[::-1] for row in board]
+    assert len(keys) == 1, "Test failed: symmetric boards have different keys."
+    other = [[X, EMPTY, O], [EMPTY, X, EMPTY], [O, EMPTY, EMPTY]]
+    assert ttt.board_key(other) not in keys
+
+
+def test_transposition_table_persists():
+    """
+    Test that minimax values are kept between calls and stay correct.
+    """
+    import bitboard
+
+    ttt.transposition_table.clear()
+    assert ttt.minimax(ttt.initial_state()) in ttt.actions(ttt.initial_state())
+    size = len(ttt.transposition_table)
+    assert 0 < size < 1000, "Test failed: symmetric positions were not shared."
+
+    # Later moves only read the table
+    ttt.minimax(ttt.result(ttt.initial_state(), (1, 1)))
+    assert len(ttt.transposition_table) == size
+
+    for board in reachable_boards():
+        assert minimax_value(board) == bitboard.value(*bitboard.encode(board))